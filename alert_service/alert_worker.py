@@ -2,8 +2,14 @@ import asyncio
 import json
 import redis.asyncio as aioredis
 from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
 from telegram.request import HTTPXRequest
-from config import TELEGRAM_BOT_TOKEN, REDIS_HOST, REDIS_PORT, REDIS_DB
+from config import (
+    TELEGRAM_BOT_TOKEN, REDIS_HOST, REDIS_PORT, REDIS_DB,
+    ALERT_LATENCY_SLO, LATENCY_WINDOW, LATENCY_REPORT_INTERVAL,
+    ALERT_CONSUMER_GROUP, ALERT_CONSUMER_NAME, ALERT_BATCH, ALERT_STALE_SECONDS,
+)
+from latency import LatencyTracker
 from datetime import datetime, timezone
 import time
 
@@ -14,13 +20,23 @@ request = HTTPXRequest(connect_timeout=30, read_timeout=30)
 bot = Bot(token=TELEGRAM_BOT_TOKEN, request=request)
 
 MESSAGE_TRACK_KEY = "sent_messages"  # Redis hash to store message_id per user+asset+exchange
+ALERT_STREAM = "alerts"
 
-async def send_alert(alert: dict):
+latency = LatencyTracker(ALERT_LATENCY_SLO, window=LATENCY_WINDOW, report_interval=LATENCY_REPORT_INTERVAL)
+
+def retry_after_seconds(e) -> float:
+    """RetryAfter.retry_after is an int on older python-telegram-bot releases and a timedelta on newer ones."""
+    retry_after = e.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+
+async def send_alert(alert: dict) -> bool:
     """
     Sends or updates a Telegram message for a specific user+asset+exchange.
+    Returns False if the alert should be retried (Telegram rate limit, network or Redis
+    trouble), True once it was sent or Telegram rejected it for good.
     """
+    key = alert_key(alert)
     try:
-        key = f"{alert['user_id']}:{alert['asset']}:{alert['exchange']}"
         message_id = await r.hget(MESSAGE_TRACK_KEY, key)
 
         if message_id:
@@ -34,40 +50,118 @@ async def send_alert(alert: dict):
         else:
             # Send first message
             msg = await bot.send_message(chat_id=alert["user_id"], text=alert["message"])
-            # Store message_id in Redis
-            await r.hset(MESSAGE_TRACK_KEY, key, msg.message_id)
+            # Store message_id in Redis; the alert went out either way, so a failure here is not retried
+            try:
+                await r.hset(MESSAGE_TRACK_KEY, key, msg.message_id)
+            except aioredis.RedisError as e:
+                print(f"[ALERT ERROR] Sent {key} but could not store its message id: {e}")
             print(f"[ALERT SENT] {alert['asset']} on {alert['exchange']} for user {alert['user_id']}")
+    except RetryAfter as e:
+        delay = retry_after_seconds(e)
+        print(f"[ALERT RETRY] Telegram rate limit for {key}; retrying after {delay:.0f}s")
+        await asyncio.sleep(delay)
+        return False
+    except (BadRequest, Forbidden) as e:
+        # Blocked bot, deleted chat, message no longer editable: retrying will not help
+        print(f"[ALERT DROPPED] {key}: {e}")
+        return True
+    except (NetworkError, aioredis.RedisError) as e:
+        print(f"[ALERT RETRY] {key}: {e}")
+        return False
     except Exception as e:
         print(f"[ALERT ERROR] {e}")
+        return True
+
+    if "trace" in alert:
+        alert["trace"]["sent"] = time.monotonic()
+        latency.record(alert)
+    return True
 
 async def process_alerts(alerts):
-    tasks = [send_alert(alert) for alert in alerts]
-    if tasks:
-        await asyncio.gather(*tasks, return_exceptions=True)
+    """Send alerts concurrently; returns one send_alert result per alert."""
+    if not alerts:
+        return []
+    results = await asyncio.gather(*[send_alert(alert) for alert in alerts], return_exceptions=True)
+    return [result is True for result in results]
+
+def alert_key(alert: dict) -> str:
+    return f"{alert['user_id']}:{alert['asset']}:{alert['exchange']}"
+
+def is_stale(alert: dict, now: float) -> bool:
+    try:
+        sent_at = datetime.fromisoformat(alert["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return False
+    return now - sent_at > ALERT_STALE_SECONDS
+
+def coalesce(alerts):
+    """
+    Keep only the newest alert per user+asset+exchange in a batch of {msg_id: alert}, and drop stale ones.
+    Returns ({msg_id: alert} to send, [msg_id] dropped).
+    """
+    now = datetime.now(timezone.utc).timestamp()
+    latest = {}
+    for msg_id, alert in alerts.items():
+        if is_stale(alert, now):
+            continue
+        latest[alert_key(alert)] = msg_id
+    keep = set(latest.values())
+    to_send = {msg_id: alert for msg_id, alert in alerts.items() if msg_id in keep}
+    return to_send, [msg_id for msg_id in alerts if msg_id not in keep]
+
+async def ensure_consumer_group():
+    try:
+        await r.xgroup_create(ALERT_STREAM, ALERT_CONSUMER_GROUP, id="0", mkstream=True)
+        print(f"[ALERT SERVICE] Created consumer group {ALERT_CONSUMER_GROUP} on {ALERT_STREAM}")
+    except aioredis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
 
 async def listen_alerts():
     print("[ALERT SERVICE] Listening for alerts...")
-    last_id = "0-0"
-    start_time = time.time()
+    await ensure_consumer_group()
+    # Start with our own unacked alerts from a previous run, then switch to new ones
+    read_id = "0"
 
     while True:
         try:
-            messages = await r.xread({"alerts": last_id}, block=1000, count=50)
-            if messages:
-                alerts_to_send = []
-                for stream_name, msgs in messages:
-                    for msg_id, data in msgs:
-                        alert = json.loads(data["data"])
-                        alerts_to_send.append(alert)
-                        last_id = msg_id
-                
-                current_time = time.time()
-                if current_time - start_time < 120:
-                    await process_alerts(alerts_to_send)
-                
-                start_time = current_time
-            else:
-                await asyncio.sleep(0.1)
+            messages = await r.xreadgroup(ALERT_CONSUMER_GROUP, ALERT_CONSUMER_NAME, {ALERT_STREAM: read_id},
+                                          block=1000, count=ALERT_BATCH)
+            entries = [entry for _, msgs in messages or [] for entry in msgs]
+            if not entries:
+                if read_id == "0":
+                    read_id = ">"
+                else:
+                    await asyncio.sleep(0.1)
+                continue
+
+            done, alerts = [], {}
+            for msg_id, data in entries:
+                try:
+                    alert = json.loads(data["data"])
+                    alert_key(alert)
+                except (KeyError, TypeError, ValueError):
+                    # Pending entry trimmed from the stream by MAXLEN, or malformed: nothing to send
+                    done.append(msg_id)
+                    continue
+                if "trace" in alert:
+                    alert["trace"]["read"] = time.monotonic()
+                alerts[msg_id] = alert
+
+            alerts_to_send, dropped = coalesce(alerts)
+            if dropped:
+                print(f"[ALERT SERVICE] Dropped {len(dropped)} stale or superseded alerts")
+            results = await process_alerts(list(alerts_to_send.values()))
+            sent = [msg_id for msg_id, ok in zip(alerts_to_send, results) if ok]
+            # Only sent or deliberately dropped alerts are acked; failed ones stay pending
+            done += dropped + sent
+            if done:
+                await r.xack(ALERT_STREAM, ALERT_CONSUMER_GROUP, *done)
+            if len(sent) < len(alerts_to_send):
+                print(f"[ALERT SERVICE] {len(alerts_to_send) - len(sent)} alerts not delivered; retrying them first")
+                # Pending entries are only redelivered when reading from "0"
+                read_id = "0"
+                await asyncio.sleep(1)
         except aioredis.ConnectionError:
             print("[ALERT SERVICE] Redis connection error, retrying in 3s...")
             await asyncio.sleep(3)
@@ -2,3 +2,20 @@ TELEGRAM_BOT_TOKEN = ""
 REDIS_HOST = "127.0.0.1"  # on localhost
 REDIS_PORT = 6379
 REDIS_DB = 0
+
+# Latency tracing (alerts carry a "trace" dict of monotonic stage timestamps when sampled by the worker)
+ALERT_LATENCY_SLO = 5.0        # seconds from fetch start to Telegram delivery before an alert is flagged
+LATENCY_WINDOW = 1000          # most recent traced alerts kept per stage for percentiles
+LATENCY_REPORT_INTERVAL = 60   # seconds between per-stage latency summaries
+
+# Market-view boards (market_view.py)
+MARKET_VIEW_INTERVAL = 5            # seconds between board refreshes
+MARKET_VIEW_MAX_CONCURRENT_EDITS = 20
+MARKET_VIEW_EDITS_PER_SECOND = 20   # Telegram allows ~30 msg/s per bot; the rest is left for alerts
+MARKET_VIEW_STALE_SECONDS = 30      # snapshots older than this are marked stale on the board
+
+# Alerts stream consumption
+ALERT_CONSUMER_GROUP = "alert_service"   # consumer group on the alerts stream (the worker watches its lag)
+ALERT_CONSUMER_NAME = "alert-1"          # keep stable across restarts so unacked alerts are redelivered
+ALERT_BATCH = 50                         # alerts read per XREADGROUP
+ALERT_STALE_SECONDS = 120                # alerts older than this are acked and dropped instead of sent
@@ -0,0 +1,91 @@
+# alert_service/latency.py
+"""
+Per-stage latency aggregation for traced alerts.
+
+The worker stamps sampled alerts with monotonic timestamps (fetch_start,
+fetch_acquired, fetched, evaluated, xadd); the alert service adds read and
+sent. Each stage is the gap between two consecutive stamps.
+"""
+
+import time
+from collections import deque
+from typing import Dict, List
+
+# (stage name, start stamp, end stamp)
+STAGES = (
+    ("queue", "fetch_start", "fetch_acquired"),    # waiting on the exchange's fetch semaphore
+    ("fetch", "fetch_acquired", "fetched"),        # GoMarket request
+    ("evaluate", "fetched", "evaluated"),          # threshold checks + cooldown round trips
+    ("publish", "evaluated", "xadd"),              # remaining evaluation before the XADD
+    ("stream", "xadd", "read"),                    # alerts stream backlog
+    ("send", "read", "sent"),                      # Telegram send/edit
+    ("total", "fetch_start", "sent"),
+)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class LatencyTracker:
+    """
+    Keeps a rolling window of stage durations and flags alerts whose total
+    latency exceeds the SLO.
+    """
+
+    def __init__(self, slo_seconds: float, window: int = 1000, report_interval: float = 60):
+        self.slo_seconds = slo_seconds
+        self.report_interval = report_interval
+        self.samples: Dict[str, deque] = {name: deque(maxlen=window) for name, _, _ in STAGES}
+        self.traced = 0
+        self.slo_misses = 0
+        self._last_report = time.monotonic()
+
+    def record(self, alert: dict):
+        trace = alert.get("trace")
+        if not trace:
+            return
+        self.traced += 1
+        durations = {}
+        for name, start, end in STAGES:
+            if start in trace and end in trace:
+                durations[name] = trace[end] - trace[start]
+                self.samples[name].append(durations[name])
+
+        total = durations.get("total")
+        if total is not None and total > self.slo_seconds:
+            self.slo_misses += 1
+            breakdown = ", ".join(f"{k}={v * 1000:.0f}ms" for k, v in durations.items() if k != "total")
+            print(f"[ALERT SLO] {alert.get('asset')} on {alert.get('exchange')} for user {alert.get('user_id')} "
+                  f"took {total:.2f}s (slo {self.slo_seconds}s): {breakdown}")
+        self.maybe_report()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for name, values in self.samples.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            out[name] = {
+                "p50": percentile(ordered, 50),
+                "p95": percentile(ordered, 95),
+                "p99": percentile(ordered, 99),
+                "max": ordered[-1],
+            }
+        return out
+
+    def maybe_report(self):
+        now = time.monotonic()
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        summary = self.summary()
+        if not summary:
+            return
+        print(f"[ALERT LATENCY] traced={self.traced} slo_misses={self.slo_misses}")
+        for name, stats in summary.items():
+            print(f"[ALERT LATENCY]   {name:<8} p50={stats['p50'] * 1000:.1f}ms "
+                  f"p95={stats['p95'] * 1000:.1f}ms p99={stats['p99'] * 1000:.1f}ms max={stats['max'] * 1000:.1f}ms")
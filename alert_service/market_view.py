@@ -0,0 +1,270 @@
+# alert_service/market_view.py
+"""
+Market-view fan-out: consumes the market_submissions stream and keeps one pinned
+live price board per subscribed user, edited in place.
+
+Submissions (bot_service/utils.push_market_view_config) are JSON objects:
+    {"user_id": 123, "pairs": ["BTC-USDT:binance", ...]}
+    {"user_id": 123, "assets": ["BTC-USDT"], "exchanges": ["binance", "okx"]}   # cross product
+    {"user_id": 123, "action": "stop"}
+
+Prices come from the worker's price_snapshots hash, so viewers never cause
+GoMarket fetches of their own; the union of viewed pairs is published to
+market_view_pairs so the worker polls them. Users with the same pair set share
+one render, and edits are skipped when a user's board text has not changed.
+
+Telegram calls go through one rate limiter (MARKET_VIEW_EDITS_PER_SECOND), and a
+RetryAfter from Telegram pauses every board until it expires. Each round pushes at
+most one interval's worth of boards, least recently attempted first, so with more
+changed boards than the budget the rest carry over to the next rounds instead of
+being retried all at once. Viewers who blocked the bot (Forbidden) are removed as if
+they had sent "stop".
+"""
+
+import asyncio
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from alert_worker import bot, r, retry_after_seconds
+from config import (
+    MARKET_VIEW_INTERVAL, MARKET_VIEW_MAX_CONCURRENT_EDITS, MARKET_VIEW_STALE_SECONDS,
+    MARKET_VIEW_EDITS_PER_SECOND,
+)
+
+SUBMISSION_STREAM = "market_submissions"
+VIEWS_KEY = "market_views"                   # hash user_id -> JSON sorted pair list
+VIEW_MESSAGES_KEY = "market_view_messages"   # hash user_id -> pinned board message_id
+VIEW_OFFSET_KEY = "market_view:last_id"      # last consumed market_submissions id
+VIEW_PAIRS_SET = "market_view_pairs"         # read by the worker
+PRICE_SNAPSHOT_KEY = "price_snapshots"       # written by the worker
+
+Pairs = Tuple[str, ...]
+
+
+def normalize_pair(pair: str) -> Optional[str]:
+    try:
+        asset, exchange = pair.split(":", 1)
+    except ValueError:
+        return None
+    return f"{asset.replace('/', '-').upper()}:{exchange.lower()}"
+
+
+def pairs_from_submission(sub: dict) -> Pairs:
+    pairs = list(sub.get("pairs") or [])
+    for asset in sub.get("assets") or []:
+        for exchange in sub.get("exchanges") or []:
+            pairs.append(f"{asset}:{exchange}")
+    return tuple(sorted({p for p in map(normalize_pair, pairs) if p}))
+
+
+def format_price(price: float) -> str:
+    if price >= 1000:
+        return f"{price:,.2f}"
+    if price >= 1:
+        return f"{price:.4f}"
+    return f"{price:.6g}"
+
+
+def render_board(pairs: Pairs, snapshots: Dict[str, Optional[dict]], now: float) -> str:
+    lines = ["📊 Live prices"]
+    for pair in pairs:
+        asset, exchange = pair.split(":", 1)
+        snap = snapshots.get(pair)
+        if not snap:
+            lines.append(f"{asset} on {exchange}: n/a")
+            continue
+        stale = " (stale)" if now - snap.get("ts", 0) > MARKET_VIEW_STALE_SECONDS else ""
+        lines.append(f"{asset} on {exchange}: {format_price(float(snap['price']))}{stale}")
+    return "\n".join(lines)
+
+
+class RateLimiter:
+    """Hands out evenly spaced call slots; pause() holds every caller until a Telegram RetryAfter expires."""
+
+    def __init__(self, per_second: float):
+        self.spacing = 1.0 / per_second
+        self.next_slot = 0.0
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        print(f"[MARKET VIEW] Telegram asked to retry after {seconds:.0f}s; pausing board updates")
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.spacing
+            if slot > now:
+                await asyncio.sleep(slot - now)
+            # A slot reserved before a pause started must wait the pause out too
+            if time.monotonic() >= self.paused_until:
+                return
+
+
+class MarketViewFanout:
+    def __init__(self):
+        self.views: Dict[str, Pairs] = {}
+        self.message_ids: Dict[str, int] = {}
+        self.last_text: Dict[str, str] = {}
+        self.last_pushed: Dict[str, float] = {}
+        self.edit_semaphore = asyncio.Semaphore(MARKET_VIEW_MAX_CONCURRENT_EDITS)
+        self.limiter = RateLimiter(MARKET_VIEW_EDITS_PER_SECOND)
+        self.round_budget = max(1, int(MARKET_VIEW_EDITS_PER_SECOND * MARKET_VIEW_INTERVAL))
+
+    async def load(self):
+        views = await r.hgetall(VIEWS_KEY)
+        self.views = {user_id: tuple(json.loads(raw)) for user_id, raw in views.items()}
+        messages = await r.hgetall(VIEW_MESSAGES_KEY)
+        self.message_ids = {user_id: int(mid) for user_id, mid in messages.items()}
+        print(f"[MARKET VIEW] Loaded {len(self.views)} viewers")
+
+    # ---------------- Subscriptions ---------------- #
+    async def apply_submissions(self, submissions: Iterable[dict]):
+        changed = False
+        pipe = r.pipeline(transaction=False)
+        for sub in submissions:
+            user_id = str(sub.get("user_id", ""))
+            if not user_id:
+                continue
+            pairs = () if sub.get("action") == "stop" else pairs_from_submission(sub)
+            if pairs:
+                self.views[user_id] = pairs
+                pipe.hset(VIEWS_KEY, user_id, json.dumps(pairs))
+            elif user_id in self.views:
+                del self.views[user_id]
+                self.last_text.pop(user_id, None)
+                self.last_pushed.pop(user_id, None)
+                pipe.hdel(VIEWS_KEY, user_id)
+            changed = True
+
+        if changed:
+            union = {p for pairs in self.views.values() for p in pairs}
+            pipe.delete(VIEW_PAIRS_SET)
+            if union:
+                pipe.sadd(VIEW_PAIRS_SET, *union)
+            await pipe.execute()
+
+    async def consume_submissions(self):
+        last_id = await r.get(VIEW_OFFSET_KEY) or "0-0"
+        while True:
+            try:
+                messages = await r.xread({SUBMISSION_STREAM: last_id}, block=1000, count=500)
+                if not messages:
+                    continue
+                subs = []
+                for _, msgs in messages:
+                    for msg_id, data in msgs:
+                        last_id = msg_id
+                        try:
+                            subs.append(json.loads(data["data"]))
+                        except (KeyError, ValueError):
+                            print(f"[MARKET VIEW] Ignoring malformed submission {msg_id}")
+                await self.apply_submissions(subs)
+                await r.set(VIEW_OFFSET_KEY, last_id)
+            except Exception as e:
+                print(f"[MARKET VIEW] Submission consumer error: {e}")
+                await asyncio.sleep(3)
+
+    # ---------------- Boards ---------------- #
+    async def refresh(self):
+        if not self.views:
+            return
+        pair_list = sorted({p for pairs in self.views.values() for p in pairs})
+        raw = await r.hmget(PRICE_SNAPSHOT_KEY, pair_list)
+        snapshots = {pair: json.loads(val) for pair, val in zip(pair_list, raw) if val}
+
+        # One render per distinct pair set
+        now = time.time()
+        renders: Dict[Pairs, str] = {}
+        pending: List[Tuple[str, str]] = []
+        for user_id, pairs in self.views.items():
+            text = renders.get(pairs)
+            if text is None:
+                text = renders[pairs] = render_board(pairs, snapshots, now)
+            if self.last_text.get(user_id) != text:
+                pending.append((user_id, text))
+
+        if len(pending) > self.round_budget:
+            # Least recently attempted first; the rest stay changed and are picked up next round
+            pending.sort(key=lambda item: self.last_pushed.get(item[0], 0.0))
+            pending = pending[:self.round_budget]
+        if pending:
+            await asyncio.gather(*[self.push_board(u, t) for u, t in pending], return_exceptions=True)
+
+    async def call_telegram(self, method, **kwargs):
+        await self.limiter.acquire()
+        try:
+            return await method(**kwargs)
+        except RetryAfter as e:
+            self.limiter.pause(retry_after_seconds(e))
+            raise
+
+    async def remove_viewer(self, user_id: str):
+        """Drop a viewer Telegram no longer lets us reach, as a "stop" submission would."""
+        await self.apply_submissions([{"user_id": user_id, "action": "stop"}])
+        self.message_ids.pop(user_id, None)
+        await r.hdel(VIEW_MESSAGES_KEY, user_id)
+
+    async def push_board(self, user_id: str, text: str):
+        async with self.edit_semaphore:
+            message_id = self.message_ids.get(user_id)
+            # Stamped on every attempt, so boards that keep failing move to the back of the queue
+            self.last_pushed[user_id] = time.monotonic()
+            try:
+                if message_id:
+                    try:
+                        await self.call_telegram(bot.edit_message_text, chat_id=user_id, message_id=message_id,
+                                                 text=text)
+                    except BadRequest as e:
+                        if "not modified" not in str(e).lower():
+                            # Board was deleted or is no longer editable; start a new one
+                            message_id = None
+                if not message_id:
+                    msg = await self.call_telegram(bot.send_message, chat_id=user_id, text=text)
+                    message_id = msg.message_id
+                    self.message_ids[user_id] = message_id
+                    await r.hset(VIEW_MESSAGES_KEY, user_id, message_id)
+                    try:
+                        await self.call_telegram(bot.pin_chat_message, chat_id=user_id, message_id=message_id,
+                                                 disable_notification=True)
+                    except BadRequest as e:
+                        print(f"[MARKET VIEW] Could not pin board for user {user_id}: {e}")
+                self.last_text[user_id] = text
+            except RetryAfter:
+                # Limiter is paused; the board is still pending and goes out in a later round
+                pass
+            except Forbidden as e:
+                print(f"[MARKET VIEW] Removing board for user {user_id}: {e}")
+                try:
+                    await self.remove_viewer(user_id)
+                except Exception as e:
+                    print(f"[MARKET VIEW ERROR] Could not remove viewer {user_id}: {e}")
+            except Exception as e:
+                print(f"[MARKET VIEW ERROR] user {user_id}: {e}")
+
+    async def board_loop(self):
+        while True:
+            started = time.monotonic()
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[MARKET VIEW] Refresh error: {e}")
+            await asyncio.sleep(max(0.0, MARKET_VIEW_INTERVAL - (time.monotonic() - started)))
+
+
+async def run_market_views():
+    fanout = MarketViewFanout()
+    await fanout.load()
+    print("[MARKET VIEW] Fan-out running...")
+    await asyncio.gather(fanout.consume_submissions(), fanout.board_loop())
+
+
+if __name__ == "__main__":
+    asyncio.run(run_market_views())
@@ -0,0 +1,198 @@
+# all_in_one.py
+"""
+Single-process launcher: bot, worker and alert service in one event loop.
+
+The alerts, user_submissions and pair_updates streams are served by bounded
+in-process logs (local_streams.py) instead of Redis, removing the XADD -> XREAD
+network hops. Hashes and sets (subscriptions, cooldowns, message ids) still
+live in Redis. Use --streams redis to keep Redis streams as well, i.e. the
+distributed wiring in one process.
+
+    python all_in_one.py run [--streams local|redis] [--market-views]
+    python all_in_one.py bench [--streams local|redis] --alerts 20000 --rate 2000 [--redis-db 15]
+
+bench pushes synthetic alerts through the worker's client and the real
+listen_alerts/send_alert path with a stubbed Telegram Bot, then reports
+tick-to-send latency percentiles and peak RSS for the chosen stream backend.
+Run it once per backend (separate processes) to compare memory. Both services
+are pointed at a scratch Redis db (--redis-db) that must be empty, so the
+bench never reads, acks or deletes the production alerts stream and group.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import redis.asyncio as aioredis
+
+from local_streams import LocalStreams, StreamRouter, SyncStreamRouter
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+LOCAL_STREAMS = ("alerts", "user_submissions", "pair_updates")
+STREAM_MAXLEN = int(os.getenv("LOCAL_STREAM_MAXLEN", "10000"))
+
+
+def load_service(dirname: str, modules, config_defaults=None):
+    """
+    Import modules from a service directory. Every service has its own flat
+    `config` module, so each one is imported against its own config and then
+    dropped from sys.modules before the next service loads. config_defaults
+    fill in config values the service left empty.
+    """
+    path = os.path.join(ROOT, dirname)
+    sys.modules.pop("config", None)
+    sys.path.insert(0, path)
+    try:
+        config = importlib.import_module("config")
+        for name, value in (config_defaults or {}).items():
+            if not getattr(config, name, None):
+                setattr(config, name, value)
+        return [importlib.import_module(name) for name in modules]
+    finally:
+        sys.path.remove(path)
+        sys.modules.pop("config", None)
+
+
+def alert_config_defaults():
+    """In one process the alert service sends through the bot's token unless it has its own."""
+    bot_config, = load_service("bot_service", ["config"])
+    return {"TELEGRAM_BOT_TOKEN": bot_config.TELEGRAM_BOT_TOKEN}
+
+
+def route_streams(local: LocalStreams, async_modules=(), sync_modules=()):
+    for module in async_modules:
+        module.r = StreamRouter(module.r, local, LOCAL_STREAMS)
+    for module in sync_modules:
+        module.r = SyncStreamRouter(module.r, local, LOCAL_STREAMS)
+
+
+async def run_all(args):
+    worker, = load_service("worker_service", ["worker"])
+    alert_modules = ["alert_worker"] + (["market_view"] if args.market_views else [])
+    alert_loaded = load_service("alert_service", alert_modules, alert_config_defaults())
+    alert_worker = alert_loaded[0]
+    bot, handlers, utils = load_service("bot_service", ["bot", "handlers", "utils"])
+
+    if args.streams == "local":
+        local = LocalStreams(maxlen=STREAM_MAXLEN)
+        route_streams(local, async_modules=(worker, alert_worker, handlers), sync_modules=(bot, utils))
+
+    app = bot.build_application()
+    services = [worker.poll_loop(), alert_worker.listen_alerts()]
+    if args.market_views:
+        services.append(alert_loaded[1].run_market_views())
+
+    async with app:
+        await app.start()
+        await app.updater.start_polling()
+        print(f"[ALL-IN-ONE] Bot, worker and alert service running (streams={args.streams})")
+        try:
+            await asyncio.gather(*services)
+        finally:
+            await app.updater.stop()
+            await app.stop()
+
+
+class BenchBot:
+    """Telegram stand-in for bench: records when each alert's send completes."""
+
+    def __init__(self, latencies):
+        self.latencies = latencies
+        self.ids = 0
+
+    def _record(self, text):
+        sent_at = time.monotonic()
+        _, marker, stamp = text.rpartition("#")
+        if marker:
+            self.latencies.append(sent_at - float(stamp))
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self._record(text)
+        self.ids += 1
+        return SimpleNamespace(message_id=self.ids)
+
+    async def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        self._record(text)
+        return True
+
+
+async def bench(args):
+    worker, = load_service("worker_service", ["worker"])
+    alert_worker, = load_service("alert_service", ["alert_worker"], alert_config_defaults())
+    if args.redis_db in (worker.REDIS_DB, alert_worker.REDIS_DB):
+        raise SystemExit(f"Redis db {args.redis_db} is the services' own db; pick a scratch db for bench")
+    # Both services share one client on the scratch db, so nothing touches the live keys
+    scratch = aioredis.Redis(host=worker.REDIS_HOST, port=worker.REDIS_PORT, db=args.redis_db, decode_responses=True)
+    try:
+        await run_bench(args, worker, alert_worker, scratch)
+    finally:
+        await scratch.aclose()
+
+
+async def run_bench(args, worker, alert_worker, scratch):
+    if await scratch.dbsize():
+        raise SystemExit(f"Redis db {args.redis_db} is not empty; pick a scratch db for bench")
+    worker.r = alert_worker.r = scratch
+    if args.streams == "local":
+        route_streams(LocalStreams(maxlen=STREAM_MAXLEN), async_modules=(worker, alert_worker))
+
+    latencies = []
+    alert_worker.bot = BenchBot(latencies)
+    listener = asyncio.create_task(alert_worker.listen_alerts())
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    interval = 1.0 / args.rate
+    started = time.monotonic()
+    for i in range(args.alerts):
+        # Pace on a fixed schedule so the consumer sees a steady tick rate. Always yield:
+        # a local XADD never suspends, so a producer behind schedule would starve the consumer
+        delay = started + i * interval - time.monotonic()
+        await asyncio.sleep(max(delay, 0))
+        alert = worker.build_alert(f"bench{i % args.users}", "BTC-USDT", "bench", 100.0, 99.0,
+                                   datetime.now(timezone.utc))
+        # The send timestamp is parsed back out of the message by BenchBot
+        alert["message"] = f"{alert['message']} #{time.monotonic()!r}"
+        await worker.r.xadd(worker.ALERT_STREAM, {"data": json.dumps(alert)})
+
+    deadline = time.monotonic() + 30
+    while len(latencies) < args.alerts and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    elapsed = time.monotonic() - started
+    listener.cancel()
+
+    ordered = sorted(latencies)
+    pct = lambda p: ordered[min(len(ordered) - 1, int(p / 100 * (len(ordered) - 1)))] * 1000 if ordered else 0.0  # noqa: E731
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"[BENCH] streams={args.streams} alerts={len(ordered)}/{args.alerts} rate={args.rate}/s in {elapsed:.2f}s")
+    print(f"[BENCH] tick-to-send p50={pct(50):.2f}ms p95={pct(95):.2f}ms p99={pct(99):.2f}ms max={pct(100):.2f}ms")
+    print(f"[BENCH] peak RSS {rss_after / 1024:.1f} MiB (was {rss_before / 1024:.1f} MiB before publishing)")
+    # The db was empty before the run, so everything in it is the bench's own
+    await scratch.flushdb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all services in one process, or benchmark stream backends")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_p = sub.add_parser("run")
+    run_p.add_argument("--streams", choices=("local", "redis"), default="local")
+    run_p.add_argument("--market-views", action="store_true", help="also run the market-view fan-out")
+    bench_p = sub.add_parser("bench")
+    bench_p.add_argument("--streams", choices=("local", "redis"), default="local")
+    bench_p.add_argument("--alerts", type=int, default=20000)
+    bench_p.add_argument("--rate", type=float, default=2000, help="alerts per second")
+    bench_p.add_argument("--users", type=int, default=1000, help="distinct users the alerts are spread over")
+    bench_p.add_argument("--redis-db", type=int, default=15, help="empty scratch Redis db for the bench")
+    args = parser.parse_args()
+
+    asyncio.run(run_all(args) if args.command == "run" else bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import json
+import math
 import redis.asyncio as redis
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
@@ -158,7 +159,7 @@ async def handle_exchange_selection(update: Update, context: ContextTypes.DEFAUL
             context.user_data["current_threshold_asset"] = asset
             context.user_data["current_threshold_exchanges"] = exchanges
             context.user_data["current_exchange_index"] = 0
-            await safe_reply(update, f"Enter threshold for {asset} on {exchanges[0]}:")
+            await safe_reply(update, f"Enter threshold for {asset} on {exchanges[0]} (e.g. 45000, or <45000 to alert below):")
         return
 
     ex = data.split(":", 1)[1]
@@ -171,19 +172,44 @@ async def handle_exchange_selection(update: Update, context: ContextTypes.DEFAUL
     await send_exchange_buttons(update, context)
 
 
-async def save_user_market_threshold(exchange: str, user_id: str, asset: str, threshold: float):
+def parse_threshold_input(text: str):
+    """
+    "45000" or ">45000" -> (45000.0, "above"); "<45000" -> (45000.0, "below").
+    Raises ValueError for anything else, including nan/inf.
+    """
+    text = text.strip()
+    direction = "above"
+    if text[:1] in ("<", ">"):
+        direction = "below" if text[0] == "<" else "above"
+        text = text[1:].strip()
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(f"threshold must be finite, got {value}")
+    return value, direction
+
+async def save_user_market_threshold(exchange: str, user_id: str, asset: str, threshold: float,
+                                     direction: str = "above"):
     key = f"pair:{exchange}"
 
     # Store each user info as JSON in a Redis hash
     user_info = json.dumps({
         "asset": asset,
-        "threshold": threshold
+        "threshold": threshold,
+        "direction": direction
     })
 
     await r.hset(key, str(user_id), user_info)
 
 # ----------------- Threshold input ----------------- #
 async def handle_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Only the first matching text handler runs, so the other text flows are dispatched from here
+    if context.user_data.get("configuring_pair"):
+        await handle_new_threshold(update, context)
+        return
+    if "current_threshold_asset" not in context.user_data:
+        await echo(update, context)
+        return
+
     user_id = update.effective_user.id
 
     asset = context.user_data["current_threshold_asset"]
@@ -192,13 +218,13 @@ async def handle_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE):
     ex = exchanges[idx]
 
     try:
-        threshold_value = float(update.message.text.strip())
+        threshold_value, direction = parse_threshold_input(update.message.text)
     except ValueError:
-        await safe_reply(update, "⚠️ Please enter a valid number for threshold.")
+        await safe_reply(update, "⚠️ Please enter a valid number for threshold (prefix with < to alert below it).")
         return
 
     # --- Save user threshold to the market hash in Redis ---
-    await save_user_market_threshold(ex, user_id, asset, threshold_value)
+    await save_user_market_threshold(ex, user_id, asset, threshold_value, direction)
 
     # Move to next exchange
     idx += 1
@@ -315,6 +341,21 @@ async def handle_config_pair(update: Update, context: ContextTypes.DEFAULT_TYPE)
     context.user_data["configuring_pair"] = pair_key
     await query.edit_message_text(f"You are configuring *{pair_label(pair_key)}*.\nSend the new threshold value.", parse_mode="Markdown")
 
+async def handle_new_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    pair_key = context.user_data.get("configuring_pair")
+    if not pair_key:
+        return
+    try:
+        threshold_value, direction = parse_threshold_input(update.message.text)
+    except ValueError:
+        await safe_reply(update, "⚠️ Please enter a valid number for threshold (prefix with < to alert below it).")
+        return
+
+    asset, ex = pair_key.split(":", 1)
+    await save_user_market_threshold(ex, update.effective_user.id, asset, threshold_value, direction)
+    context.user_data.pop("configuring_pair", None)
+    await safe_reply(update, f"✅ Threshold for {pair_label(pair_key)} updated to {threshold_value}.")
+
 # ----------------- Fallback ----------------- #
 async def echo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.message.from_user.id == context.bot.id:
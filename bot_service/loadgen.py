@@ -0,0 +1,226 @@
+# bot_service/loadgen.py
+"""
+Synthetic load generator for the bot's setup flow.
+
+Builds realistic Update objects and feeds them through the real Application
+(handlers registered by bot.register_handlers) with a stubbed Bot that never
+talks to Telegram. Redis is real: point it at a local instance and a scratch
+DB (--redis-db), since the flow writes pair:{exchange} hashes for the
+synthetic users.
+
+Each simulated user walks the full setup:
+    /start -> asset:<a>... -> done_assets -> (exchange:<e>... -> done_asset) per asset -> one threshold per pair
+
+Example:
+    python loadgen.py --users 5000 --concurrency 500 --redis-db 15
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import redis.asyncio as redis
+from telegram import Update
+from telegram.ext import ApplicationBuilder, ExtBot
+
+import handlers
+from bot import register_handlers
+from config import REDIS_HOST, REDIS_PORT
+
+BOT_ID = 900000001
+BASE_USER_ID = 7000000000
+
+
+class StubBot(ExtBot):
+    """
+    ExtBot whose transport is replaced: every API call returns a canned result
+    after an optional simulated round trip.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(token=f"{BOT_ID}:LOADGEN")
+        with self._unfrozen():
+            self._latency = latency
+            self._message_ids = itertools.count(1)
+            self.api_calls: Dict[str, int] = defaultdict(int)
+
+    async def initialize(self):
+        # Skip request setup and the real getMe; _do_post answers getMe below
+        await self.get_me()
+        self._initialized = True
+
+    async def shutdown(self):
+        self._initialized = False
+
+    async def _do_post(self, endpoint, data, **kwargs):
+        self.api_calls[endpoint] += 1
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        if endpoint == "getMe":
+            return {"id": BOT_ID, "is_bot": True, "first_name": "LoadGen", "username": "loadgen_bot"}
+        if endpoint in ("sendMessage", "editMessageText"):
+            chat_id = int(data.get("chat_id") or 0)
+            return bot_message(chat_id, data.get("text", ""), data.get("message_id") or next(self._message_ids))
+        return True
+
+
+def bot_message(chat_id: int, text: str, message_id: int) -> dict:
+    return {
+        "message_id": message_id,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "from": {"id": BOT_ID, "is_bot": True, "first_name": "LoadGen"},
+        "text": text,
+    }
+
+
+class UpdateFactory:
+    def __init__(self, bot: StubBot):
+        self.bot = bot
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1_000_000)
+
+    @staticmethod
+    def user(user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"load{user_id}"}
+
+    def text(self, user_id: int, text: str) -> Update:
+        message = {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self.user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return Update.de_json({"update_id": next(self.update_ids), "message": message}, self.bot)
+
+    def callback(self, user_id: int, data: str) -> Update:
+        query = {
+            "id": str(next(self.update_ids)),
+            "from": self.user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": bot_message(user_id, "", next(self.message_ids)),
+        }
+        return Update.de_json({"update_id": next(self.update_ids), "callback_query": query}, self.bot)
+
+
+def setup_script(factory: UpdateFactory, user_id: int, rng: random.Random, max_assets: int, max_exchanges: int):
+    """Yield the updates one user sends to complete the setup flow."""
+    assets = rng.sample(handlers.ASSETS, rng.randint(1, max_assets))
+    yield factory.text(user_id, "/start")
+    for asset in assets:
+        yield factory.callback(user_id, f"asset:{asset}")
+    yield factory.callback(user_id, "done_assets")
+
+    chosen = {asset: rng.sample(handlers.EXCHANGES, rng.randint(1, max_exchanges)) for asset in assets}
+    for asset in assets:
+        for ex in chosen[asset]:
+            yield factory.callback(user_id, f"exchange:{ex}")
+        yield factory.callback(user_id, "done_asset")
+    for asset in assets:
+        for _ in chosen[asset]:
+            yield factory.text(user_id, f"{rng.uniform(1, 100000):.2f}")
+
+
+def instrument(app, latencies: Dict[str, List[float]]):
+    """Wrap every registered handler callback to record its latency by name."""
+    for group in app.handlers.values():
+        for handler in group:
+            callback = handler.callback
+
+            async def timed(update, context, _cb=callback, _name=callback.__name__):
+                started = time.perf_counter()
+                try:
+                    return await _cb(update, context)
+                finally:
+                    latencies[_name].append(time.perf_counter() - started)
+
+            handler.callback = timed
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))]
+
+
+async def redis_commands(client) -> int:
+    info = await client.info("stats")
+    return int(info["total_commands_processed"])
+
+
+async def run(args):
+    handlers.r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=args.redis_db, decode_responses=True)
+    if await handlers.r.dbsize() and not args.allow_dirty:
+        raise SystemExit(f"Redis db {args.redis_db} is not empty; pick a scratch db or pass --allow-dirty")
+
+    bot = StubBot(latency=args.bot_latency / 1000.0)
+    app = ApplicationBuilder().bot(bot).updater(None).build()
+    register_handlers(app)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    instrument(app, latencies)
+
+    factory = UpdateFactory(bot)
+    rng = random.Random(args.seed)
+    scripts = [
+        list(setup_script(factory, BASE_USER_ID + i, rng, args.max_assets, args.max_exchanges))
+        for i in range(args.users)
+    ]
+    total_updates = sum(len(s) for s in scripts)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    errors = []
+
+    async def record_error(update, context):
+        errors.append(context.error)
+
+    app.add_error_handler(record_error)
+    completed = 0
+
+    async def run_user(script):
+        nonlocal completed
+        async with semaphore:
+            for update in script:
+                await app.process_update(update)
+            completed += 1
+
+    async with app:
+        commands_before = await redis_commands(handlers.r)
+        started = time.perf_counter()
+        await asyncio.gather(*[run_user(s) for s in scripts])
+        elapsed = time.perf_counter() - started
+        # The two INFO calls are themselves counted
+        redis_ops = await redis_commands(handlers.r) - commands_before - 1
+
+    print(f"[LOADGEN] {completed} setups, {total_updates} updates in {elapsed:.2f}s "
+          f"({total_updates / elapsed:,.0f} updates/s, {completed / elapsed:,.1f} setups/s)")
+    print(f"[LOADGEN] redis ops/setup: {redis_ops / max(completed, 1):.2f}  handler errors: {len(errors)}")
+    print(f"[LOADGEN] bot api calls: {dict(bot.api_calls)}")
+    for name, values in sorted(latencies.items()):
+        ordered = sorted(values)
+        print(f"[LOADGEN]   {name:<26} n={len(ordered):<7} p50={percentile(ordered, 50) * 1000:.2f}ms "
+              f"p95={percentile(ordered, 95) * 1000:.2f}ms p99={percentile(ordered, 99) * 1000:.2f}ms")
+    await handlers.r.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive synthetic users through the bot setup flow")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200, help="users clicking through at the same time")
+    parser.add_argument("--max-assets", type=int, default=2)
+    parser.add_argument("--max-exchanges", type=int, default=3)
+    parser.add_argument("--bot-latency", type=float, default=0.0, help="simulated Telegram round trip (ms)")
+    parser.add_argument("--redis-db", type=int, default=15, help="scratch Redis db for the synthetic users")
+    parser.add_argument("--allow-dirty", action="store_true", help="run even if the Redis db has keys")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# local_streams.py
+"""
+In-process stand-in for the Redis streams used between services.
+
+LocalStreams keeps one bounded log per stream with XADD/XREAD semantics
+(entry ids "ms-seq", reads return entries after the given id, "$" means
+only new entries, the oldest entries are trimmed like XADD MAXLEN).
+Consumer groups cover what the alert service and the worker's backpressure
+use: XGROUP CREATE, XREADGROUP (">" for new entries, "0" for pending ones),
+XACK and XINFO GROUPS with lag and pending counts.
+
+StreamRouter / SyncStreamRouter wrap an existing redis client: stream
+commands for the routed stream names are served by LocalStreams, every
+other command goes to Redis unchanged. Services keep calling r.xadd /
+r.xread and do not know which backend they are on.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+Entry = Tuple[str, Dict[str, str]]
+
+
+def _seq(entry_id: str) -> int:
+    """Local ids are "ms-seq" with seq unique per stream, so ordering only needs seq."""
+    try:
+        return int(str(entry_id).rsplit("-", 1)[-1])
+    except ValueError:
+        return 0
+
+
+class LocalGroup:
+    __slots__ = ("last_delivered", "pending")
+
+    def __init__(self, last_delivered: int):
+        self.last_delivered = last_delivered
+        self.pending: Dict[str, int] = {}   # entry id -> seq, delivered but not acked
+
+
+class LocalStream:
+    __slots__ = ("entries", "next_seq", "waiters", "groups")
+
+    def __init__(self, maxlen: int):
+        self.entries: Deque[Tuple[int, Entry]] = deque(maxlen=maxlen)
+        self.next_seq = 1
+        self.waiters: List[asyncio.Future] = []
+        self.groups: Dict[str, LocalGroup] = {}
+
+    @property
+    def last_seq(self) -> int:
+        return self.next_seq - 1
+
+    def after(self, seq: int, count: Optional[int]) -> List[Entry]:
+        if not self.entries or seq >= self.last_seq:
+            return []
+        first = self.entries[0][0]
+        start = max(0, seq + 1 - first)
+        stop = None if count is None else start + count
+        return [entry for _, entry in itertools.islice(self.entries, start, stop)]
+
+
+class LocalStreams:
+    def __init__(self, maxlen: int = 10_000):
+        self.maxlen = maxlen
+        self.streams: Dict[str, LocalStream] = {}
+
+    def stream(self, name: str) -> LocalStream:
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = self.streams[name] = LocalStream(self.maxlen)
+        return stream
+
+    def xadd_nowait(self, name: str, fields: Dict[str, str]) -> str:
+        stream = self.stream(name)
+        seq = stream.next_seq
+        stream.next_seq += 1
+        entry_id = f"{int(time.time() * 1000)}-{seq}"
+        stream.entries.append((seq, (entry_id, {k: str(v) for k, v in fields.items()})))
+        waiters, stream.waiters = stream.waiters, []
+        for fut in waiters:
+            if not fut.done():
+                fut.set_result(None)
+        return entry_id
+
+    async def xadd(self, name: str, fields: Dict[str, str], **_ignored) -> str:
+        return self.xadd_nowait(name, fields)
+
+    async def xread(self, streams: Dict[str, str], count: Optional[int] = None,
+                    block: Optional[int] = None) -> List[List]:
+        positions = {}
+        for name, last_id in streams.items():
+            stream = self.stream(name)
+            positions[name] = stream.last_seq if last_id == "$" else _seq(last_id)
+
+        deadline = None if block is None else time.monotonic() + block / 1000.0
+        while True:
+            result = []
+            for name, seq in positions.items():
+                entries = self.stream(name).after(seq, count)
+                if entries:
+                    result.append([name, entries])
+            if result or block is None:
+                return result
+
+            remaining = None if block == 0 else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+            fut = asyncio.get_running_loop().create_future()
+            for name in positions:
+                self.stream(name).waiters.append(fut)
+            try:
+                await asyncio.wait_for(fut, remaining)
+            except asyncio.TimeoutError:
+                return []
+            finally:
+                for name in positions:
+                    waiters = self.stream(name).waiters
+                    if fut in waiters:
+                        waiters.remove(fut)
+
+    async def xlen(self, name: str) -> int:
+        return len(self.stream(name).entries)
+
+    async def xgroup_create(self, name: str, groupname: str, id: str = "$", mkstream: bool = False) -> bool:
+        stream = self.stream(name)
+        if groupname not in stream.groups:
+            stream.groups[groupname] = LocalGroup(stream.last_seq if id == "$" else _seq(id))
+        return True
+
+    async def xreadgroup(self, groupname: str, consumername: str, streams: Dict[str, str],
+                         count: Optional[int] = None, block: Optional[int] = None) -> List[List]:
+        # A single consumer per group is all the services use, so pending entries are per group
+        result = []
+        new_streams = {}
+        for name, read_id in streams.items():
+            stream = self.stream(name)
+            group = stream.groups[groupname]
+            if read_id == ">":
+                new_streams[name] = f"0-{group.last_delivered}"
+                continue
+            start = _seq(read_id)
+            ids = sorted((seq, entry_id) for entry_id, seq in group.pending.items() if seq > start)[:count]
+            by_seq = {seq: entry for seq, entry in stream.entries}
+            # Entries trimmed since delivery come back with empty fields, as in Redis
+            entries = [by_seq.get(seq, (entry_id, {})) for seq, entry_id in ids]
+            result.append([name, entries])
+        if result or not new_streams:
+            return result
+
+        messages = await self.xread(new_streams, count=count, block=block)
+        for name, entries in messages:
+            group = self.stream(name).groups[groupname]
+            for entry_id, _ in entries:
+                seq = _seq(entry_id)
+                group.pending[entry_id] = seq
+                group.last_delivered = max(group.last_delivered, seq)
+        return messages
+
+    async def xack(self, name: str, groupname: str, *ids) -> int:
+        group = self.stream(name).groups.get(groupname)
+        if group is None:
+            return 0
+        return sum(1 for entry_id in ids if group.pending.pop(entry_id, None) is not None)
+
+    async def xinfo_groups(self, name: str) -> List[Dict]:
+        stream = self.stream(name)
+        return [
+            {
+                "name": groupname,
+                "consumers": 1,
+                "pending": len(group.pending),
+                "last-delivered-id": f"0-{group.last_delivered}",
+                "lag": stream.last_seq - group.last_delivered,
+            }
+            for groupname, group in stream.groups.items()
+        ]
+
+
+class StreamRouter:
+    """Async redis client wrapper routing selected streams to LocalStreams."""
+
+    def __init__(self, client, local: LocalStreams, names):
+        self._client = client
+        self._local = local
+        self._names = frozenset(names)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    async def xadd(self, name, fields, *args, **kwargs):
+        if name in self._names:
+            return await self._local.xadd(name, fields)
+        return await self._client.xadd(name, fields, *args, **kwargs)
+
+    async def xread(self, streams, count=None, block=None, **kwargs):
+        local = {k: v for k, v in streams.items() if k in self._names}
+        if not local:
+            return await self._client.xread(streams, count=count, block=block, **kwargs)
+        if len(local) != len(streams):
+            raise ValueError("cannot XREAD local and Redis streams in one call")
+        return await self._local.xread(local, count=count, block=block)
+
+    async def xlen(self, name):
+        if name in self._names:
+            return await self._local.xlen(name)
+        return await self._client.xlen(name)
+
+    async def xgroup_create(self, name, groupname, id="$", mkstream=False, **kwargs):
+        if name in self._names:
+            return await self._local.xgroup_create(name, groupname, id=id, mkstream=mkstream)
+        return await self._client.xgroup_create(name, groupname, id=id, mkstream=mkstream, **kwargs)
+
+    async def xreadgroup(self, groupname, consumername, streams, count=None, block=None, **kwargs):
+        local = {k: v for k, v in streams.items() if k in self._names}
+        if not local:
+            return await self._client.xreadgroup(groupname, consumername, streams, count=count, block=block, **kwargs)
+        if len(local) != len(streams):
+            raise ValueError("cannot XREADGROUP local and Redis streams in one call")
+        return await self._local.xreadgroup(groupname, consumername, local, count=count, block=block)
+
+    async def xack(self, name, groupname, *ids):
+        if name in self._names:
+            return await self._local.xack(name, groupname, *ids)
+        return await self._client.xack(name, groupname, *ids)
+
+    async def xinfo_groups(self, name):
+        if name in self._names:
+            return await self._local.xinfo_groups(name)
+        return await self._client.xinfo_groups(name)
+
+
+class SyncStreamRouter:
+    """Sync redis client wrapper (bot.py / utils.py); XADD to routed streams never blocks."""
+
+    def __init__(self, client, local: LocalStreams, names):
+        self._client = client
+        self._local = local
+        self._names = frozenset(names)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def xadd(self, name, fields, *args, **kwargs):
+        if name in self._names:
+            return self._local.xadd_nowait(name, fields)
+        return self._client.xadd(name, fields, *args, **kwargs)
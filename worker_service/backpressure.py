@@ -0,0 +1,134 @@
+# worker_service/backpressure.py
+"""
+Backpressure between the worker and the alert service.
+
+The alert service consumes the alerts stream through a consumer group, so
+XINFO GROUPS reports how far behind it is (lag = entries not yet delivered,
+pending = delivered but not acked). When lag + pending rises above the high
+watermark, the worker stops XADDing and holds alerts in memory, keyed by
+user/asset/exchange so a newer alert replaces the one it supersedes. Once the
+backlog falls below the low watermark the held alerts are flushed, minus any
+that went stale while held. The held map is capped; the oldest entries are
+dropped first, and the stream itself is capped with XADD MAXLEN.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("worker_service.backpressure")
+
+
+def alert_key(alert: Dict) -> str:
+    return f"{alert['user_id']}:{alert['asset']}:{alert['exchange']}"
+
+
+def alert_age(alert: Dict, now: float) -> float:
+    try:
+        return now - datetime.fromisoformat(alert["timestamp"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+class AlertBackpressure:
+    def __init__(self, stream: str, group: str, high: int, low: int, max_held: int,
+                 stream_maxlen: int, stale_seconds: float):
+        self.stream = stream
+        self.group = group
+        self.high = high
+        self.low = low
+        self.max_held = max_held
+        self.stream_maxlen = stream_maxlen
+        self.stale_seconds = stale_seconds
+
+        self.engaged = False
+        self.backlog: Optional[int] = None
+        self.held: "OrderedDict[str, Dict]" = OrderedDict()
+        self.coalesced = 0
+        self.dropped = 0
+
+    async def refresh(self, client):
+        """Re-read consumer lag/pending; engage or release backpressure with hysteresis."""
+        try:
+            groups = await client.xinfo_groups(self.stream)
+        except Exception as e:
+            # No stream yet (nothing published) or Redis trouble: leave the state as it is
+            logger.debug("XINFO GROUPS %s failed: %s", self.stream, e)
+            return
+        info = next((g for g in groups if g.get("name") == self.group), None)
+        if info is None:
+            # Alert service has never attached; MAXLEN alone bounds the stream
+            self.backlog = None
+            return
+        lag = info.get("lag")
+        if lag is None:
+            lag = await self.count_undelivered(client, info.get("last-delivered-id"))
+        self.backlog = int(lag) + int(info.get("pending") or 0)
+
+        if not self.engaged and self.backlog >= self.high:
+            self.engaged = True
+            logger.warning("Alert consumers behind (backlog=%d >= %d); holding and coalescing alerts",
+                           self.backlog, self.high)
+        elif self.engaged and self.backlog <= self.low:
+            self.engaged = False
+            logger.info("Alert consumers caught up (backlog=%d); flushing %d held alerts "
+                        "(%d coalesced, %d dropped while held)",
+                        self.backlog, len(self.held), self.coalesced, self.dropped)
+            await self.flush(client)
+
+    async def count_undelivered(self, client, last_delivered: Optional[str]) -> int:
+        """
+        Redis < 7 (or lag unknown after trimming): count entries after the group's
+        last-delivered-id, up to high + 1, which is all the watermarks need. XLEN would
+        also count every acked entry still in the stream. If that range cannot be read,
+        only the pending entries count.
+        """
+        if not last_delivered:
+            return 0
+        try:
+            entries = await client.xrange(self.stream, min=f"({last_delivered}", max="+", count=self.high + 1)
+        except Exception as e:
+            # Exclusive ranges need Redis >= 6.2
+            logger.debug("XRANGE after %s on %s failed: %s", last_delivered, self.stream, e)
+            return 0
+        return len(entries)
+
+    def hold(self, alerts: List[Dict]):
+        for alert in alerts:
+            key = alert_key(alert)
+            if key in self.held:
+                # Newer alert for the same user/pair supersedes the held one
+                del self.held[key]
+                self.coalesced += 1
+            self.held[key] = alert
+        while len(self.held) > self.max_held:
+            self.held.popitem(last=False)
+            self.dropped += 1
+
+    async def publish(self, client, alerts: List[Dict]) -> int:
+        """XADD alerts, or hold them while backpressure is engaged. Returns the number XADDed."""
+        if self.engaged:
+            self.hold(alerts)
+            return 0
+        if not alerts:
+            return 0
+        await asyncio.gather(*[
+            client.xadd(self.stream, {"data": json.dumps(a)}, maxlen=self.stream_maxlen, approximate=True)
+            for a in alerts
+        ])
+        return len(alerts)
+
+    async def flush(self, client):
+        now = time.time()
+        fresh = [a for a in self.held.values() if alert_age(a, now) <= self.stale_seconds]
+        stale = len(self.held) - len(fresh)
+        self.held.clear()
+        self.coalesced = self.dropped = 0
+        if stale:
+            logger.info("Discarded %d held alerts older than %ss", stale, self.stale_seconds)
+        if fresh:
+            await self.publish(client, fresh)
@@ -0,0 +1,201 @@
+# worker_service/bulk_subscriptions.py
+"""
+Bulk import/export of threshold subscriptions.
+
+Rows are {"user_id", "asset", "exchange", "threshold"} plus optional
+"direction" ("above"/"below") and "hysteresis", as CSV (header row) or JSONL.
+The same JSONL is accepted by replay.py --subs.
+
+Import streams the file and writes fixed-size batches, each in one MULTI/EXEC
+pipeline: HSET into pair:{exchange}, SADD to active_pairs, and one pair_updates
+entry per touched hash, so the worker never sees a subscription without its
+active pair. pair:{exchange} holds one field per user, so a later row for the
+same user and exchange replaces the earlier one.
+
+Export SCANs the pair:{exchange} hashes and streams them back out in the same format.
+
+Examples:
+    python bulk_subscriptions.py import desk.csv
+    python bulk_subscriptions.py export subs.jsonl
+"""
+
+import argparse
+import csv
+import json
+import logging
+import math
+import sys
+import time
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple, Union
+
+import redis
+
+from config import REDIS_HOST, REDIS_PORT, REDIS_DB
+from crossing import ABOVE, BELOW
+from worker import ACTIVE_PAIRS_SET, PAIR_HASH_PREFIX, normalize_asset
+
+PAIR_UPDATES_STREAM = "pair_updates"
+BATCH_SIZE = 10_000
+FIELDS = ("user_id", "asset", "exchange", "threshold", "direction", "hysteresis")
+
+logger = logging.getLogger("worker_service.bulk")
+
+
+def detect_format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_rows(f: TextIO, fmt: str) -> Iterator[Union[dict, str]]:
+    """CSV rows come back as dicts; JSONL lines come back unparsed and are decoded per row by to_entry."""
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+        return
+    for line in f:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def to_entry(row: Union[dict, str]) -> Tuple[str, str, str, str]:
+    """
+    Validate a row (a dict, or a JSONL line) and return (exchange, user_id, "asset:exchange", hash value JSON).
+    Raises ValueError/KeyError/TypeError on bad input.
+    """
+    if isinstance(row, str):
+        row = json.loads(row)   # JSONDecodeError is a ValueError
+    if not isinstance(row, dict):
+        raise TypeError(f"expected an object, got {type(row).__name__}")
+    user_id = str(row["user_id"]).strip()
+    asset = normalize_asset(str(row["asset"]).strip())
+    exchange = str(row["exchange"]).strip().lower()
+    if not user_id or not asset or not exchange:
+        raise ValueError("user_id, asset and exchange are required")
+    threshold = float(row["threshold"])
+    if not math.isfinite(threshold):
+        raise ValueError(f"threshold must be finite, got {threshold}")
+    value = {"asset": asset, "threshold": threshold}
+    direction = str(row.get("direction") or "").strip().lower()
+    if direction:
+        if direction not in (ABOVE, BELOW):
+            raise ValueError(f"unknown direction {direction!r}")
+        value["direction"] = direction
+    hysteresis = row.get("hysteresis")
+    if hysteresis not in (None, ""):
+        band = abs(float(hysteresis))
+        if not math.isfinite(band):
+            raise ValueError(f"hysteresis must be finite, got {band}")
+        value["hysteresis"] = band
+    return exchange, user_id, f"{asset}:{exchange}", json.dumps(value)
+
+
+def _write_batch(client: redis.Redis, batch: Dict[str, Dict[str, str]], pairs: set):
+    pipe = client.pipeline(transaction=True)
+    for exchange, fields in batch.items():
+        pipe.hset(f"{PAIR_HASH_PREFIX}{exchange}", mapping=fields)
+    pipe.sadd(ACTIVE_PAIRS_SET, *pairs)
+    for exchange in batch:
+        pipe.xadd(PAIR_UPDATES_STREAM, {"pair": f"{PAIR_HASH_PREFIX}{exchange}"})
+    pipe.execute()
+
+
+def import_subscriptions(client: redis.Redis, rows: Iterable[Union[dict, str]], batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """
+    Write subscriptions to Redis in pipelined batches. Returns {"imported", "skipped"}.
+    Memory is bounded by batch_size regardless of input size.
+    """
+    imported = skipped = pending = 0
+    batch: Dict[str, Dict[str, str]] = {}
+    pairs = set()
+    for n, row in enumerate(rows, 1):
+        try:
+            exchange, user_id, pair, value = to_entry(row)
+        except (ValueError, KeyError, TypeError) as e:
+            skipped += 1
+            logger.warning("Skipping row %d (%s): %s", n, e, row)
+            continue
+        batch.setdefault(exchange, {})[user_id] = value
+        pairs.add(pair)
+        pending += 1
+        if pending >= batch_size:
+            _write_batch(client, batch, pairs)
+            imported += pending
+            batch, pairs, pending = {}, set(), 0
+    if pending:
+        _write_batch(client, batch, pairs)
+        imported += pending
+    return {"imported": imported, "skipped": skipped}
+
+
+def iter_subscriptions(client: redis.Redis, scan_count: int = BATCH_SIZE) -> Iterator[dict]:
+    """Stream every subscription stored in pair:{exchange} hashes."""
+    for key in client.scan_iter(match=f"{PAIR_HASH_PREFIX}*", count=scan_count, _type="hash"):
+        exchange = key[len(PAIR_HASH_PREFIX):]
+        if ":" in exchange:
+            # pair:{asset}:{exchange} keys are not threshold hashes
+            continue
+        for user_id, raw in client.hscan_iter(key, count=scan_count):
+            try:
+                value = json.loads(raw)
+                row = {
+                    "user_id": user_id,
+                    "asset": value["asset"],
+                    "exchange": exchange,
+                    "threshold": value["threshold"],
+                    "direction": value.get("direction", ABOVE),
+                    "hysteresis": value.get("hysteresis", ""),
+                }
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping malformed entry %s[%s]: %s", key, user_id, raw)
+                continue
+            yield row
+
+
+def export_subscriptions(client: redis.Redis, f: TextIO, fmt: str) -> int:
+    count = 0
+    writer = csv.DictWriter(f, fieldnames=FIELDS) if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+    for row in iter_subscriptions(client):
+        if writer:
+            writer.writerow(row)
+        else:
+            f.write(json.dumps(row) + "\n")
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export threshold subscriptions")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help="CSV/JSONL file, or - for stdin/stdout")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="defaults to the file extension (jsonl for -)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+    fmt = detect_format(args.path, args.format)
+    started = time.perf_counter()
+
+    if args.command == "import":
+        f = sys.stdin if args.path == "-" else open(args.path, newline="")
+        try:
+            stats = import_subscriptions(client, read_rows(f, fmt), args.batch_size)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        print(f"[BULK] imported {stats['imported']} subscriptions ({stats['skipped']} skipped) "
+              f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    else:
+        f = sys.stdout if args.path == "-" else open(args.path, "w", newline="")
+        try:
+            count = export_subscriptions(client, f, fmt)
+        finally:
+            if f is not sys.stdout:
+                f.close()
+        print(f"[BULK] exported {count} subscriptions in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
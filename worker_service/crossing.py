@@ -0,0 +1,162 @@
+# worker_service/crossing.py
+"""
+Edge-triggered threshold crossing with hysteresis.
+
+Every subscription is armed until it fires. An "above" subscription fires when
+price >= threshold and re-arms once price drops below threshold - band; a
+"below" subscription fires when price <= threshold and re-arms once price
+rises above threshold + band.
+
+A CrossingBook holds the state for one asset+exchange. Fire and re-arm levels
+are kept in sorted arrays, so a tick from p0 to p1 only visits subscriptions
+whose level lies between the two prices.
+"""
+
+import json
+import math
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+ABOVE = "above"
+BELOW = "below"
+
+
+class Subscription:
+    __slots__ = ("user_id", "threshold", "direction", "band", "armed", "raw")
+
+    def __init__(self, user_id: str, threshold: float, direction: str = ABOVE, band: float = 0.0,
+                 raw: Optional[str] = None):
+        self.user_id = user_id
+        self.threshold = threshold
+        self.direction = direction
+        self.band = band
+        self.armed = True
+        self.raw = raw
+
+    @property
+    def rearm_level(self) -> float:
+        return self.threshold - self.band if self.direction == ABOVE else self.threshold + self.band
+
+    def triggered(self, price: float) -> bool:
+        return price >= self.threshold if self.direction == ABOVE else price <= self.threshold
+
+    def rearmed(self, price: float) -> bool:
+        return price < self.rearm_level if self.direction == ABOVE else price > self.rearm_level
+
+
+def parse_subscription(user_id: str, raw: str, hysteresis_pct: float) -> Tuple[str, Subscription]:
+    """
+    Parse a pair:{exchange} hash value:
+        {"asset": "BTC-USDT", "threshold": 45000, "direction": "above"|"below", "hysteresis": <price band>}
+    direction defaults to above; hysteresis defaults to hysteresis_pct percent of the threshold.
+    Returns (asset, Subscription); raises ValueError/TypeError/KeyError on malformed input.
+    Non-finite thresholds and bands are rejected: a NaN level would break the sorted
+    level arrays and make bisect skip other users' subscriptions on the pair.
+    """
+    value = json.loads(raw)
+    threshold = float(value["threshold"])
+    if not math.isfinite(threshold):
+        raise ValueError(f"threshold must be finite, got {threshold}")
+    direction = (value.get("direction") or ABOVE).lower()
+    if direction not in (ABOVE, BELOW):
+        raise ValueError(f"unknown direction {direction!r}")
+    band = value.get("hysteresis")
+    band = abs(float(band)) if band is not None else abs(threshold) * hysteresis_pct / 100.0
+    if not math.isfinite(band):
+        raise ValueError(f"hysteresis must be finite, got {band}")
+    return value.get("asset", ""), Subscription(user_id, threshold, direction, band, raw)
+
+
+class _Levels:
+    """Subscriptions sorted by one level (fire or re-arm)."""
+    __slots__ = ("levels", "subs")
+
+    def __init__(self, subs: List[Subscription], key):
+        ordered = sorted(subs, key=key)
+        self.subs = ordered
+        self.levels = [key(s) for s in ordered]
+
+    def between(self, lo: float, hi: float, include_lo: bool) -> List[Subscription]:
+        """Subscriptions with level in (lo, hi] or, with include_lo, [lo, hi)."""
+        if include_lo:
+            return self.subs[bisect_left(self.levels, lo):bisect_left(self.levels, hi)]
+        return self.subs[bisect_right(self.levels, lo):bisect_right(self.levels, hi)]
+
+
+class CrossingBook:
+    def __init__(self):
+        self.subs: Dict[str, Subscription] = {}
+        self.last_price: Optional[float] = None
+        self._fresh: List[Subscription] = []
+        self._index: Optional[Dict[str, _Levels]] = None
+
+    def sync(self, subs: Dict[str, Subscription]):
+        """
+        Replace the subscription set. Unchanged entries (same raw value) keep their
+        state; new or edited ones start armed and are checked on the next update().
+        """
+        changed = len(subs) != len(self.subs)
+        merged: Dict[str, Subscription] = {}
+        for user_id, sub in subs.items():
+            current = self.subs.get(user_id)
+            if current is not None and current.raw is not None and current.raw == sub.raw:
+                merged[user_id] = current
+                continue
+            merged[user_id] = sub
+            self._fresh.append(sub)
+            changed = True
+        if changed:
+            self.subs = merged
+            self._fresh = [s for s in self._fresh if merged.get(s.user_id) is s]
+            self._index = None
+
+    def _levels(self) -> Dict[str, _Levels]:
+        if self._index is None:
+            above = [s for s in self.subs.values() if s.direction == ABOVE]
+            below = [s for s in self.subs.values() if s.direction == BELOW]
+            threshold = lambda s: s.threshold  # noqa: E731
+            rearm = lambda s: s.rearm_level  # noqa: E731
+            self._index = {
+                "above_fire": _Levels(above, threshold),
+                "above_rearm": _Levels(above, rearm),
+                "below_fire": _Levels(below, threshold),
+                "below_rearm": _Levels(below, rearm),
+            }
+        return self._index
+
+    def update(self, price: float) -> List[Subscription]:
+        """
+        Apply a new price and return the subscriptions that fired (now disarmed).
+        """
+        fired: List[Subscription] = []
+        fresh = set()
+        for sub in self._fresh:
+            fresh.add(sub.user_id)
+            if sub.triggered(price):
+                sub.armed = False
+                fired.append(sub)
+        self._fresh = []
+
+        p0 = self.last_price
+        self.last_price = price
+        if p0 is None or p0 == price:
+            return fired
+
+        idx = self._levels()
+        if price > p0:
+            # Rising: above subs fire (level in (p0, price]); below subs re-arm (level in [p0, price))
+            candidates_fire = idx["above_fire"].between(p0, price, include_lo=False)
+            candidates_rearm = idx["below_rearm"].between(p0, price, include_lo=True)
+        else:
+            # Falling: below subs fire (level in [price, p0)); above subs re-arm (level in (price, p0])
+            candidates_fire = idx["below_fire"].between(price, p0, include_lo=True)
+            candidates_rearm = idx["above_rearm"].between(price, p0, include_lo=False)
+
+        for sub in candidates_rearm:
+            if not sub.armed and sub.rearmed(price):
+                sub.armed = True
+        for sub in candidates_fire:
+            if sub.armed and sub.user_id not in fresh and sub.triggered(price):
+                sub.armed = False
+                fired.append(sub)
+        return fired
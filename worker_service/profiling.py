@@ -0,0 +1,163 @@
+# worker_service/profiling.py
+"""
+On-demand profiling and slow-cycle capture for the worker poll loop.
+
+- A cProfile session for the next N cycles can be armed at runtime with
+  SIGUSR1 or by setting the Redis control key (value = number of cycles).
+  Profiles are written as standard pstats files (.prof), readable with
+  `python -m pstats`, snakeviz, etc.
+- Cycles slower than a threshold are captured to JSON with per-pair timings
+  and the worst event-loop lag observed during the cycle.
+
+When no session is armed and the slow-cycle threshold is 0, the poll loop
+does not wrap anything and no lag probe runs.
+"""
+
+import asyncio
+import cProfile
+import json
+import logging
+import os
+import signal
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger("worker_service.profiling")
+
+
+class Cycle:
+    """State for one in-flight poll cycle (several may overlap, one per exchange loop)."""
+    __slots__ = ("label", "started", "max_lag", "pair_timings")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.started = time.monotonic()
+        self.max_lag = 0.0
+        self.pair_timings: Dict[Tuple[str, str], float] = {}
+
+
+class CycleProfiler:
+    def __init__(self, profile_dir: str, slow_cycle_seconds: float, default_cycles: int,
+                 lag_probe_interval: float = 0.05):
+        self.profile_dir = profile_dir
+        self.slow_cycle_seconds = slow_cycle_seconds
+        self.default_cycles = default_cycles
+        self.lag_probe_interval = lag_probe_interval
+
+        self._pending_cycles = 0
+        self._remaining_cycles = 0
+        self._profile: Optional[cProfile.Profile] = None
+        self._lag_task: Optional[asyncio.Task] = None
+        self._open_cycles: Set[Cycle] = set()
+
+    # ---------------- Control ---------------- #
+    def request(self, cycles: Optional[int] = None):
+        """Arm a cProfile session covering the next `cycles` poll cycles (across all exchange loops)."""
+        self._pending_cycles = max(1, cycles or self.default_cycles)
+        logger.info("Profiling armed for the next %d cycles", self._pending_cycles)
+
+    def install_signal_handler(self, sig: Optional[int] = None):
+        # Resolved here, not as a default argument: SIGUSR1 does not exist on every platform
+        sig = sig if sig is not None else getattr(signal, "SIGUSR1", None)
+        if sig is None:
+            logger.warning("Signal-triggered profiling is not available on this platform")
+            return
+        try:
+            asyncio.get_running_loop().add_signal_handler(sig, self.request)
+        except (NotImplementedError, RuntimeError):
+            logger.warning("Signal-triggered profiling is not available on this platform")
+
+    async def poll_control_key(self, redis_client, key: str):
+        """Consume a profiling request left in Redis (value = number of cycles)."""
+        try:
+            val = await redis_client.getdel(key)
+        except Exception:
+            logger.exception("Failed to read profiling control key %s", key)
+            return
+        if val is None:
+            return
+        try:
+            self.request(int(val))
+        except (ValueError, TypeError):
+            self.request()
+
+    # ---------------- Cycle hooks ---------------- #
+    @property
+    def active(self) -> bool:
+        return self._pending_cycles > 0 or self._remaining_cycles > 0 or self.slow_cycle_seconds > 0
+
+    def start_lag_probe(self):
+        if self.slow_cycle_seconds > 0 and self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._probe_loop_lag())
+
+    async def _probe_loop_lag(self):
+        while True:
+            expected = time.monotonic() + self.lag_probe_interval
+            await asyncio.sleep(self.lag_probe_interval)
+            lag = time.monotonic() - expected
+            for cycle in self._open_cycles:
+                if lag > cycle.max_lag:
+                    cycle.max_lag = lag
+
+    def cycle_start(self, label: str = "") -> Cycle:
+        if self._pending_cycles and self._profile is None:
+            self._remaining_cycles = self._pending_cycles
+            self._pending_cycles = 0
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        cycle = Cycle(label)
+        self._open_cycles.add(cycle)
+        return cycle
+
+    def cycle_end(self, cycle: Cycle) -> float:
+        self._open_cycles.discard(cycle)
+        duration = time.monotonic() - cycle.started
+
+        if self._profile is not None:
+            self._remaining_cycles -= 1
+            if self._remaining_cycles <= 0:
+                self._profile.disable()
+                path = self._output_path("cycles", "prof")
+                self._profile.dump_stats(path)
+                self._profile = None
+                logger.info("Wrote cycle profile to %s", path)
+
+        if 0 < self.slow_cycle_seconds < duration:
+            self._capture_slow_cycle(cycle, duration)
+        return duration
+
+    def timed(self, cycle: Cycle, asset: str, exchange: str, coro_fn: Callable[..., Awaitable], *args) -> Awaitable:
+        """Wrap a per-pair coroutine so its wall time lands in the cycle's pair_timings."""
+        async def runner():
+            started = time.monotonic()
+            try:
+                return await coro_fn(*args)
+            finally:
+                cycle.pair_timings[(asset, exchange)] = time.monotonic() - started
+        return runner()
+
+    # ---------------- Output ---------------- #
+    def _output_path(self, kind: str, ext: str) -> str:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        return os.path.join(self.profile_dir, f"{kind}-{stamp}.{ext}")
+
+    def _capture_slow_cycle(self, cycle: Cycle, duration: float):
+        timings = sorted(cycle.pair_timings.items(), key=lambda kv: kv[1], reverse=True)
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "cycle": cycle.label,
+            "cycle_seconds": duration,
+            "threshold_seconds": self.slow_cycle_seconds,
+            "max_loop_lag_seconds": cycle.max_lag,
+            "pairs": [
+                {"asset": asset, "exchange": exchange, "seconds": secs}
+                for (asset, exchange), secs in timings
+            ],
+        }
+        path = self._output_path("slow-cycle", "json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.warning("Slow poll cycle %s %.2fs (max loop lag %.3fs); captured to %s",
+                       cycle.label, duration, cycle.max_lag, path)
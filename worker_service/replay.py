@@ -0,0 +1,143 @@
+# worker_service/replay.py
+"""
+Replay a recorded tick archive through the worker's evaluation and alert-building logic.
+
+No GoMarket or Redis traffic: subscriptions come from a JSONL file
+({"user_id": ..., "asset": ..., "exchange": ..., "threshold": ...,
+  optional "direction" and "hysteresis"} per line), crossing state lives in
+CrossingBooks exactly as in the worker, and cooldowns are tracked in memory
+against tick time.
+
+Examples:
+    python replay.py --day 2026-10-18 --subs subs.jsonl --alerts-out alerts.jsonl
+    python replay.py --archive /tmp/ticks-bench --day 2026-10-18 --subs subs.jsonl --synthesize 5000000   # benchmark
+"""
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, TextIO, Tuple
+
+from crossing import CrossingBook, parse_subscription
+from tick_archive import TickArchive, synthesize
+from worker import COOLDOWN_SECONDS, HYSTERESIS_PCT, build_alert, normalize_asset
+
+Subscriptions = Dict[Tuple[str, str], Dict[str, str]]
+
+
+def load_subscriptions(path: str) -> Subscriptions:
+    """
+    Read JSONL subscriptions into {(asset, exchange): {user_id: raw hash value}},
+    i.e. the same shape process_pair sees in pair:{exchange}.
+    """
+    subs: Subscriptions = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            row = json.loads(line)
+            asset = normalize_asset(row["asset"])
+            value = {"asset": asset, "threshold": float(row["threshold"])}
+            for opt in ("direction", "hysteresis"):
+                if row.get(opt) not in (None, ""):
+                    value[opt] = row[opt]
+            subs.setdefault((asset, row["exchange"].lower()), {})[str(row["user_id"])] = json.dumps(value)
+    return subs
+
+
+def build_books(subs: Subscriptions, hysteresis_pct: float) -> Dict[Tuple[str, str], CrossingBook]:
+    books = {}
+    for key, users in subs.items():
+        book = CrossingBook()
+        book.sync({user_id: parse_subscription(user_id, raw, hysteresis_pct)[1] for user_id, raw in users.items()})
+        books[key] = book
+    return books
+
+
+def replay(archive: TickArchive, subs: Subscriptions, alerts_out: Optional[TextIO] = None,
+           cooldown_seconds: int = COOLDOWN_SECONDS, hysteresis_pct: float = HYSTERESIS_PCT) -> Dict[str, float]:
+    """
+    Drive every tick in the archive through CrossingBook.update/build_alert.
+    Returns counters: ticks, alerts, suppressed (cooldown), seconds.
+    """
+    books = build_books(subs, hysteresis_pct)
+    # Resolve archive ids to books once, so the hot loop is index lookups only
+    by_id: Dict[Tuple[int, int], CrossingBook] = {}
+    for a_id, asset in enumerate(archive.assets):
+        for e_id, exchange in enumerate(archive.exchanges):
+            book = books.get((asset, exchange))
+            if book is not None:
+                by_id[(a_id, e_id)] = book
+
+    last_alert: Dict[Tuple[str, int, int], float] = {}
+    alerts = suppressed = 0
+    started = time.perf_counter()
+
+    for ts, a_id, e_id, price in archive:
+        book = by_id.get((a_id, e_id))
+        if book is None or price <= 0.0:
+            continue
+        for sub in book.update(price):
+            key = (sub.user_id, a_id, e_id)
+            last = last_alert.get(key)
+            if last is not None and ts - last < cooldown_seconds:
+                suppressed += 1
+                continue
+            last_alert[key] = ts
+            alerts += 1
+            if alerts_out is not None:
+                alert = build_alert(sub.user_id, archive.assets[a_id], archive.exchanges[e_id], price, sub.threshold,
+                                    datetime.fromtimestamp(ts, tz=timezone.utc), sub.direction)
+                alerts_out.write(json.dumps(alert) + "\n")
+
+    return {
+        "ticks": len(archive),
+        "alerts": alerts,
+        "suppressed": suppressed,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded tick archive against subscriptions")
+    parser.add_argument("--archive", default="ticks", help="tick archive root (TICK_ARCHIVE_DIR)")
+    parser.add_argument("--day", required=True, help="UTC day to replay, YYYY-MM-DD")
+    parser.add_argument("--subs", required=True, help="JSONL subscriptions file")
+    parser.add_argument("--alerts-out", help="write generated alerts as JSONL here")
+    parser.add_argument("--cooldown", type=int, default=COOLDOWN_SECONDS, help="cooldown seconds (tick time)")
+    parser.add_argument("--hysteresis-pct", type=float, default=HYSTERESIS_PCT,
+                        help="default re-arm band for subscriptions without their own, % of threshold")
+    parser.add_argument("--synthesize", type=int, metavar="N",
+                        help="first write N synthetic ticks for the subscribed pairs into an empty --day (benchmark mode)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    subs = load_subscriptions(args.subs)
+    if args.synthesize:
+        pairs = sorted(subs)
+        start_prices = {
+            asset: sum(json.loads(raw)["threshold"] for raw in subs[(asset, ex)].values()) / len(subs[(asset, ex)])
+            for asset, ex in pairs
+        }
+        try:
+            synthesize(args.archive, args.day, args.synthesize, pairs, start_prices, seed=args.seed)
+        except FileExistsError as e:
+            parser.error(str(e))
+
+    out = open(args.alerts_out, "w") if args.alerts_out else None
+    try:
+        with TickArchive(args.archive, args.day) as archive:
+            stats = replay(archive, subs, out, args.cooldown, args.hysteresis_pct)
+    finally:
+        if out is not None:
+            out.close()
+
+    rate = stats["ticks"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(f"[REPLAY] {args.day}: {stats['ticks']} ticks, {stats['alerts']} alerts, "
+          f"{stats['suppressed']} suppressed by cooldown in {stats['seconds']:.2f}s ({rate:,.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+# worker_service/tick_archive.py
+"""
+Append-only columnar archive of fetched price snapshots.
+
+One directory per UTC day, one fixed-width file per column:
+
+    {root}/{YYYY-MM-DD}/ts.f64        unix seconds (float64)
+    {root}/{YYYY-MM-DD}/asset.u16     asset id (uint16, index into symbols.json "assets")
+    {root}/{YYYY-MM-DD}/exchange.u16  exchange id (uint16, index into symbols.json "exchanges")
+    {root}/{YYYY-MM-DD}/price.f64     price (float64)
+    {root}/{YYYY-MM-DD}/symbols.json  {"assets": [...], "exchanges": [...], "byteorder": "little"}
+
+Columns are written in native byte order and read back through mmap without copying.
+If the process dies mid-flush the columns may differ in length; readers use the shortest,
+and a recorder reopening the day truncates every column to that common row count before
+appending, so later rows stay aligned.
+"""
+
+import json
+import mmap
+import os
+import random
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+COLUMNS = (("ts", "f64", "d"), ("asset", "u16", "H"), ("exchange", "u16", "H"), ("price", "f64", "d"))
+SYMBOLS_FILE = "symbols.json"
+
+
+def day_of(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _column_path(day_dir: str, name: str, ext: str) -> str:
+    return os.path.join(day_dir, f"{name}.{ext}")
+
+
+def _truncate_columns(day_dir: str, rows: int):
+    for name, ext, code in COLUMNS:
+        path = _column_path(day_dir, name, ext)
+        size = rows * array(code).itemsize
+        if os.path.exists(path) and os.path.getsize(path) != size:
+            os.truncate(path, size)
+
+
+def repair_day(day_dir: str) -> int:
+    """
+    Truncate every column of a day to the longest whole-row length they all share
+    (dropping partial items and rows a torn flush left in only some columns).
+    Returns the row count.
+    """
+    counts = []
+    for name, ext, code in COLUMNS:
+        path = _column_path(day_dir, name, ext)
+        counts.append(os.path.getsize(path) // array(code).itemsize if os.path.exists(path) else 0)
+    rows = min(counts)
+    _truncate_columns(day_dir, rows)
+    return rows
+
+
+def _load_symbols(day_dir: str) -> Dict[str, List[str]]:
+    path = os.path.join(day_dir, SYMBOLS_FILE)
+    if not os.path.exists(path):
+        return {"assets": [], "exchanges": [], "byteorder": sys.byteorder}
+    with open(path) as f:
+        return json.load(f)
+
+
+class TickRecorder:
+    """
+    Buffers ticks in memory and appends them to the day's column files on flush().
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._day: Optional[str] = None
+        self._symbols: Dict[str, List[str]] = {}
+        self._ids: Dict[str, Dict[str, int]] = {}
+        self._symbols_dirty = False
+        self._buffers = {name: array(code) for name, _, code in COLUMNS}
+        self._rows = 0   # rows already on disk for the current day
+
+    def _switch_day(self, day: str):
+        self.flush()
+        self._day = day
+        day_dir = os.path.join(self.root, day)
+        os.makedirs(day_dir, exist_ok=True)
+        self._rows = repair_day(day_dir)
+        self._symbols = _load_symbols(day_dir)
+        self._ids = {
+            kind: {name: i for i, name in enumerate(self._symbols[kind])}
+            for kind in ("assets", "exchanges")
+        }
+
+    def _symbol_id(self, kind: str, name: str) -> int:
+        ids = self._ids[kind]
+        sid = ids.get(name)
+        if sid is None:
+            sid = ids[name] = len(self._symbols[kind])
+            self._symbols[kind].append(name)
+            self._symbols_dirty = True
+        return sid
+
+    def record(self, asset: str, exchange: str, price: float, ts: float):
+        day = day_of(ts)
+        if day != self._day:
+            self._switch_day(day)
+        self._buffers["ts"].append(ts)
+        self._buffers["asset"].append(self._symbol_id("assets", asset))
+        self._buffers["exchange"].append(self._symbol_id("exchanges", exchange))
+        self._buffers["price"].append(price)
+
+    def flush(self):
+        if self._day is None:
+            return
+        day_dir = os.path.join(self.root, self._day)
+        # Symbols first so every id present in a column is resolvable
+        if self._symbols_dirty:
+            tmp = os.path.join(day_dir, SYMBOLS_FILE + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump(self._symbols, f)
+            os.replace(tmp, os.path.join(day_dir, SYMBOLS_FILE))
+            self._symbols_dirty = False
+        if not self._buffers["ts"]:
+            return
+        try:
+            for name, ext, _ in COLUMNS:
+                with open(_column_path(day_dir, name, ext), "ab") as f:
+                    self._buffers[name].tofile(f)
+        except BaseException:
+            # Undo the columns that were written so a retry does not misalign them
+            _truncate_columns(day_dir, self._rows)
+            raise
+        # Buffers are only dropped once every column holds the batch
+        self._rows += len(self._buffers["ts"])
+        self._buffers = {name: array(code) for name, _, code in COLUMNS}
+
+
+class TickArchive:
+    """
+    Read-only, memory-mapped view of one day of ticks.
+    """
+
+    def __init__(self, root: str, day: str):
+        self.day_dir = os.path.join(root, day)
+        symbols = _load_symbols(self.day_dir)
+        if symbols.get("byteorder", sys.byteorder) != sys.byteorder:
+            raise ValueError(f"{self.day_dir} was written on a {symbols['byteorder']}-endian host")
+        self.assets: List[str] = symbols["assets"]
+        self.exchanges: List[str] = symbols["exchanges"]
+
+        self._files = []
+        self._maps = []
+        self.columns = {}
+        for name, ext, code in COLUMNS:
+            path = _column_path(self.day_dir, name, ext)
+            if not os.path.exists(path) or os.path.getsize(path) == 0:
+                self.columns[name] = memoryview(b"").cast(code)
+                continue
+            f = open(path, "rb")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._files.append(f)
+            self._maps.append(mm)
+            usable = len(mm) - len(mm) % array(code).itemsize
+            self.columns[name] = memoryview(mm)[:usable].cast(code)
+        self.length = min(len(col) for col in self.columns.values())
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[Tuple[float, int, int, float]]:
+        ts, asset, exchange, price = (self.columns[name] for name, _, _ in COLUMNS)
+        for i in range(self.length):
+            yield ts[i], asset[i], exchange[i], price[i]
+
+    def close(self):
+        for col in self.columns.values():
+            col.release()
+        for mm in self._maps:
+            mm.close()
+        for f in self._files:
+            f.close()
+        self.columns = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def synthesize(root: str, day: str, n_ticks: int, pairs: List[Tuple[str, str]],
+               start_prices: Optional[Dict[str, float]] = None, seed: int = 0):
+    """
+    Write a deterministic random-walk day of n_ticks spread across pairs (for benchmarks).
+    Refuses to touch a day that already has files, so a recorded day is never appended to.
+    """
+    day_dir = os.path.join(root, day)
+    if os.path.isdir(day_dir) and os.listdir(day_dir):
+        raise FileExistsError(f"{day_dir} already holds ticks; synthesize into an empty day or another root")
+    rng = random.Random(seed)
+    start_ts = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+    step = 86400.0 / max(n_ticks, 1)
+    prices = {pair: (start_prices or {}).get(pair[0], 100.0) for pair in pairs}
+    recorder = TickRecorder(root)
+    for i in range(n_ticks):
+        pair = pairs[i % len(pairs)]
+        prices[pair] *= 1.0 + rng.gauss(0.0, 0.0005)
+        recorder.record(pair[0], pair[1], prices[pair], start_ts + i * step)
+        if i % 100_000 == 99_999:
+            recorder.flush()
+    recorder.flush()
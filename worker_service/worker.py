@@ -87,34 +87,74 @@
 Refactored worker service:
 - Uses SMEMBERS active_pairs instead of KEYS
 - Reuses a single aiohttp.ClientSession
-- Concurrency limiter (Semaphore)
-- Cooldown to avoid repeated alerts
+- Concurrency limiter (one Semaphore per exchange)
+- One refresh loop per exchange on drift-free monotonic deadlines, under a supervisor
+- Edge-triggered crossing state (above/below + hysteresis) so a crossing alerts once
+- Cooldown on crossings to avoid repeats across restarts
 - Normalizes asset names to "BTC-USDT"
-- Pushes final alerts to Redis stream "alerts"
+- Pushes final alerts to Redis stream "alerts", holding and coalescing them while the
+  alert service's consumer group is behind
 """
 
 import asyncio
 import json
 import logging
 import os
+import random
+import time
 from datetime import datetime, timezone
-from typing import Dict, Iterable, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 
 import aiohttp
 import redis.asyncio as redis
 
 from config import REDIS_HOST, REDIS_PORT, REDIS_DB
 from api import fetch_market_data
+from backpressure import AlertBackpressure
+from crossing import ABOVE, CrossingBook, Subscription, parse_subscription
+from profiling import CycleProfiler
+from tick_archive import TickRecorder
+
+
+def parse_exchange_intervals(spec: str) -> Dict[str, float]:
+    """Parse "binance=0.5,kraken=2" into {"binance": 0.5, "kraken": 2.0}."""
+    intervals = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        exchange, _, seconds = item.partition("=")
+        intervals[exchange.strip().lower()] = float(seconds)
+    return intervals
+
 
 # --------- Tunables (override via env or edit here) ----------
-POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "1"))       # seconds between poll cycles
-MAX_CONCURRENT_FETCHES = int(os.getenv("MAX_CONCURRENT_FETCHES", "10"))
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "1"))       # seconds between poll cycles (per exchange)
+EXCHANGE_INTERVALS = parse_exchange_intervals(os.getenv("EXCHANGE_INTERVALS", ""))  # e.g. "binance=0.5,kraken=2"
+SUPERVISOR_INTERVAL = float(os.getenv("SUPERVISOR_INTERVAL", "1"))   # seconds between pair reloads / loop health checks
+LAG_REPORT_INTERVAL = float(os.getenv("LAG_REPORT_INTERVAL", "60"))  # seconds between per-exchange lag reports
+EXCHANGE_LAG_KEY = "worker:exchange_lag"                             # hash exchange -> JSON lag stats
+MAX_CONCURRENT_FETCHES = int(os.getenv("MAX_CONCURRENT_FETCHES", "10"))  # per exchange
 FETCH_TIMEOUT = int(os.getenv("FETCH_TIMEOUT", "20"))        # aiohttp timeout seconds
 COOLDOWN_SECONDS = int(os.getenv("COOLDOWN_SECONDS", "300"))  # don't re-alert same user/pair sooner than this
+HYSTERESIS_PCT = float(os.getenv("HYSTERESIS_PCT", "0.1"))    # default re-arm band, % of threshold
 ALERT_STREAM = "alerts"
+ALERT_CONSUMER_GROUP = "alert_service"                               # consumer group the alert service reads with
+ALERT_STREAM_MAXLEN = int(os.getenv("ALERT_STREAM_MAXLEN", "100000"))  # approximate cap on the alerts stream
+ALERT_STALE_SECONDS = float(os.getenv("ALERT_STALE_SECONDS", "120"))   # held alerts older than this are not flushed
+BACKPRESSURE_HIGH = int(os.getenv("BACKPRESSURE_HIGH", "1000"))      # consumer lag+pending that starts holding alerts
+BACKPRESSURE_LOW = int(os.getenv("BACKPRESSURE_LOW", "100"))         # ... and that releases them again
+BACKPRESSURE_MAX_HELD = int(os.getenv("BACKPRESSURE_MAX_HELD", "50000"))  # cap on held (coalesced) alerts
 ACTIVE_PAIRS_SET = "active_pairs"   # expected values: "BTC-USDT:binance" (asset:exchange)
-PAIR_HASH_PREFIX = "pair:"           # pair:{exchange} contains user fields -> JSON {"asset":"...","threshold":...}
+PAIR_HASH_PREFIX = "pair:"           # pair:{exchange} contains user fields -> JSON {"asset":"...","threshold":...,
+                                     #   optional "direction":"above"|"below", "hysteresis":<band>}
 LAST_ALERT_PREFIX = "last_alert:"    # last_alert:{user_id}:{asset}:{exchange} -> unix_ts
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))  # fraction of pair evaluations carrying stage timestamps
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")                   # where .prof and slow-cycle reports are written
+PROFILE_CYCLES = int(os.getenv("PROFILE_CYCLES", "10"))             # cycles covered by a SIGUSR1-triggered profile
+PROFILE_CONTROL_KEY = "worker:profile"                               # SET worker:profile <cycles> to arm a profile
+PROFILE_CONTROL_POLL = float(os.getenv("PROFILE_CONTROL_POLL", "5"))  # seconds between control key checks
+SLOW_CYCLE_SECONDS = float(os.getenv("SLOW_CYCLE_SECONDS", "0"))     # capture cycles slower than this (0 = off)
+PRICE_SNAPSHOT_KEY = "price_snapshots"   # hash "asset:exchange" -> JSON {"price": float, "ts": unix_ts} for viewed pairs, read by market views
+MARKET_VIEW_PAIRS_SET = "market_view_pairs"  # "asset:exchange" pairs someone is viewing; polled even without thresholds
+TICK_ARCHIVE_DIR = os.getenv("TICK_ARCHIVE_DIR", "")                 # record fetched prices here for replay.py ("" = off)
 # --------------------------------------------------------------
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
@@ -123,8 +163,24 @@ logger = logging.getLogger("worker_service")
 # Redis client (reused)
 r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
 
-# Semaphore for limiting concurrent fetches to external API
-fetch_semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+# Semaphores limiting concurrent fetches to the external API, one per exchange so a
+# slow or timing-out exchange cannot hold the slots the other exchange loops need
+fetch_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+# Holds/coalesces alerts while the alert service is behind; see backpressure.py
+backpressure = AlertBackpressure(ALERT_STREAM, ALERT_CONSUMER_GROUP, BACKPRESSURE_HIGH, BACKPRESSURE_LOW,
+                                 BACKPRESSURE_MAX_HELD, ALERT_STREAM_MAXLEN, ALERT_STALE_SECONDS)
+
+# Crossing state per (asset, exchange); see crossing.py
+crossing_books: Dict[Tuple[str, str], CrossingBook] = {}
+# SubscriptionIndex.version each book was last synced against
+synced_versions: Dict[Tuple[str, str], int] = {}
+
+# Parsed pair:{exchange} hashes, one per exchange
+subscription_indexes: Dict[str, "SubscriptionIndex"] = {}
+
+# Optional append-only tick archive (see tick_archive.py / replay.py)
+recorder = TickRecorder(TICK_ARCHIVE_DIR) if TICK_ARCHIVE_DIR else None
 
 
 def normalize_asset(asset: str) -> str:
@@ -137,15 +193,27 @@ def normalize_asset(asset: str) -> str:
     return asset.replace("/", "-").upper()
 
 
-async def safe_fetch(exchange: str, asset: str, session: aiohttp.ClientSession) -> Dict:
+async def safe_fetch(exchange: str, asset: str, session: aiohttp.ClientSession,
+                     trace: Optional[Dict[str, float]] = None) -> Dict:
     """
-    Fetch market data while honoring the semaphore and catching errors.
+    Fetch market data while honoring the exchange's semaphore and catching errors.
     Returns dict with keys exchange, asset, price (float)
+    If a trace dict is given, monotonic stage timestamps are written into it:
+    fetch_start (before the semaphore), fetch_acquired and fetched.
     """
-    async with fetch_semaphore:
+    if trace is not None:
+        trace["fetch_start"] = time.monotonic()
+    semaphore = fetch_semaphores.get(exchange)
+    if semaphore is None:
+        semaphore = fetch_semaphores[exchange] = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+    async with semaphore:
+        if trace is not None:
+            trace["fetch_acquired"] = time.monotonic()
         try:
             # fetch_market_data raises on non-200
             result = await asyncio.wait_for(fetch_market_data(exchange, asset, session), timeout=FETCH_TIMEOUT)
+            if trace is not None:
+                trace["fetched"] = time.monotonic()
             return result
         except asyncio.TimeoutError:
             logger.warning("Timeout fetching %s on %s", asset, exchange)
@@ -188,38 +256,145 @@ async def record_alert_timestamp(user_id: str, asset: str, exchange: str):
     await r.set(key, now_ts)
 
 
-async def load_active_pairs() -> Iterable[Tuple[str, str]]:
+def parse_pair_members(members: Iterable[str]) -> Iterable[Tuple[str, str]]:
     """
-    Read the active_pairs set and yield (asset, exchange) tuples.
-    Expected member format: "BTC-USDT:binance" (asset:exchange)
+    Parse "BTC-USDT:binance" (asset:exchange) set members into (asset, exchange) tuples.
     """
-    members = await r.smembers(ACTIVE_PAIRS_SET)
     for m in members or []:
         try:
             asset, exchange = m.split(":", 1)
             yield normalize_asset(asset), exchange.lower()
         except ValueError:
-            logger.warning("Ignoring malformed active_pairs entry: %s", m)
+            logger.warning("Ignoring malformed pair entry: %s", m)
 
 
-async def process_pair(asset: str, exchange: str, session: aiohttp.ClientSession):
+async def load_active_pairs() -> Iterable[Tuple[str, str]]:
     """
-    For a specific asset+exchange, read all users in pair:{exchange} and test thresholds.
-    This supports the existing Redis schema where pair:{exchange} is a hash:
-       field=user_id -> JSON {"asset": "BTC-USDT", "threshold": 45000}
+    Read the active_pairs set and yield (asset, exchange) tuples.
+    Expected member format: "BTC-USDT:binance" (asset:exchange)
     """
+    members = await r.smembers(ACTIVE_PAIRS_SET)
+    for pair in parse_pair_members(members):
+        yield pair
+
+
+async def load_view_pairs() -> set:
+    """
+    Pairs shown on market-view boards. They are polled (and snapshotted) even
+    when nobody has a threshold on them.
+    """
+    try:
+        members = await r.smembers(MARKET_VIEW_PAIRS_SET)
+    except Exception:
+        logger.exception("Failed to read %s", MARKET_VIEW_PAIRS_SET)
+        return set()
+    return set(parse_pair_members(members))
+
+
+async def publish_snapshots(exchange: str, snapshots: Dict[str, str]):
+    """One HSET per exchange cycle for the viewed pairs' prices collected by process_pair."""
+    if not snapshots:
+        return
+    try:
+        await r.hset(PRICE_SNAPSHOT_KEY, mapping=snapshots)
+    except Exception:
+        logger.exception("Failed to publish price snapshots for %s", exchange)
+
+
+class SubscriptionIndex:
+    """
+    Parsed view of one pair:{exchange} hash, grouped by asset. A value is only
+    parsed when its raw JSON changes, and `version` is bumped whenever the hash
+    changed, so crossing books re-sync only then.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.raw: Dict[str, str] = {}
+        self.parsed: Dict[str, Tuple[str, Optional[str], Optional[Subscription]]] = {}  # user -> (raw, asset, sub)
+        self.by_asset: Dict[str, Dict[str, Subscription]] = {}
+        self.version = 0
+
+    def update(self, users: Dict[str, str]):
+        if users == self.raw:
+            return
+        parsed = {}
+        by_asset: Dict[str, Dict[str, Subscription]] = {}
+        for user_id, value_json in users.items():
+            entry = self.parsed.get(user_id)
+            if entry is None or entry[0] != value_json:
+                try:
+                    user_asset, sub = parse_subscription(user_id, value_json, HYSTERESIS_PCT)
+                    entry = (value_json, normalize_asset(user_asset), sub)
+                except Exception:
+                    logger.warning("Invalid user entry in %s for field %s: %s", self.source, user_id, value_json)
+                    entry = (value_json, None, None)
+            parsed[user_id] = entry
+            if entry[2] is not None:
+                by_asset.setdefault(entry[1], {})[user_id] = entry[2]
+        self.raw, self.parsed, self.by_asset = users, parsed, by_asset
+        self.version += 1
+
+
+async def load_subscription_index(exchange: str) -> Optional[SubscriptionIndex]:
+    """Read pair:{exchange} once and refresh its index; None if Redis could not be read."""
     pair_hash_key = f"{PAIR_HASH_PREFIX}{exchange}"
     try:
         users = await r.hgetall(pair_hash_key)
     except Exception as e:
         logger.exception("Failed to read %s: %s", pair_hash_key, e)
+        return None
+    index = subscription_indexes.get(exchange)
+    if index is None:
+        index = subscription_indexes[exchange] = SubscriptionIndex(pair_hash_key)
+    index.update(users)
+    return index
+
+
+def build_alert(user_id: str, asset: str, exchange: str, price: float, threshold: float,
+                when: datetime, direction: str = ABOVE) -> Dict:
+    timestamp = when.isoformat()
+    crossed = "crossed" if direction == ABOVE else "fell below"
+    message = f"⚠️ {timestamp} — {asset} on {exchange} price {price} {crossed} your threshold {threshold}"
+    return {
+        "user_id": str(user_id),
+        "asset": asset,
+        "exchange": exchange,
+        "price": price,
+        "threshold": threshold,
+        "direction": direction,
+        "timestamp": timestamp,
+        "message": message
+    }
+
+
+async def process_pair(asset: str, exchange: str, session: aiohttp.ClientSession, index: SubscriptionIndex,
+                       viewed: bool = False, snapshots: Optional[Dict[str, str]] = None):
+    """
+    For a specific asset+exchange, test this asset's subscriptions from pair:{exchange}
+    (already read and parsed into `index` for the cycle). The Redis schema is a hash:
+       field=user_id -> JSON {"asset": "BTC-USDT", "threshold": 45000}
+    `viewed` pairs are fetched even when the asset has no subscriptions, and their
+    price is added to `snapshots` for the cycle's single price_snapshots write.
+    """
+    key = (asset, exchange)
+    book = crossing_books.get(key)
+    subs = index.by_asset.get(asset, {})
+    if synced_versions.get(key) != index.version and (book is not None or subs):
+        if book is None:
+            book = crossing_books[key] = CrossingBook()
+        book.sync(subs)
+        synced_versions[key] = index.version
+
+    if not subs and not viewed:
         return
 
-    if not users:
-        return
+    # Sampled evaluations carry monotonic stage timestamps through to the alert service.
+    # CLOCK_MONOTONIC is system-wide, so the stamps compare across services on one host.
+    trace = {} if TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE else None
 
     # Fetch market price for this specific asset & exchange
-    market = await safe_fetch(exchange, asset, session)
+    market = await safe_fetch(exchange, asset, session, trace)
     price = float(market.get("price", 0.0) or 0.0)
 
     # If price is 0.0 treat as missing/stale and skip alerting
@@ -228,78 +403,214 @@ async def process_pair(asset: str, exchange: str, session: aiohttp.ClientSession
         logger.debug("No price for %s on %s (skipping)", asset, exchange)
         return
 
+    now_ts = time.time()
+    if viewed and snapshots is not None:
+        snapshots[f"{asset}:{exchange}"] = json.dumps({"price": price, "ts": now_ts})
+    if recorder is not None:
+        recorder.record(asset, exchange, price, now_ts)
+
     alerts_to_push = []
 
-    for user_id, value_json in users.items():
-        try:
-            value = json.loads(value_json)
-            user_asset = normalize_asset(value.get("asset", ""))
-            threshold = float(value.get("threshold"))
-        except Exception:
-            logger.warning("Invalid user entry in %s for field %s: %s", pair_hash_key, user_id, value_json)
-            continue
+    if book is None:
+        return
 
-        # Only process if user_asset matches this asset
-        if user_asset != asset:
+    # Only subscriptions that fire on this tick are visited; the cooldown record is
+    # consulted on those transitions alone, to cover state lost on a worker restart.
+    for sub in book.update(price):
+        user_id = sub.user_id
+        cooled = await is_cooled_down(user_id, asset, exchange)
+        if not cooled:
+            logger.debug("Skipping alert due to cooldown for %s:%s on %s", user_id, asset, exchange)
             continue
 
-        # Threshold crossing logic: only alert when price >= threshold
-        if price >= threshold:
-            # Check cooldown
-            cooled = await is_cooled_down(user_id, asset, exchange)
-            if not cooled:
-                logger.debug("Skipping alert due to cooldown for %s:%s on %s", user_id, asset, exchange)
-                continue
+        alert = build_alert(user_id, asset, exchange, price, sub.threshold, datetime.now(timezone.utc), sub.direction)
+        if trace is not None:
+            alert["trace"] = {**trace, "evaluated": time.monotonic()}
+        alerts_to_push.append(alert)
+        # record timestamp to avoid duplicates
+        await record_alert_timestamp(user_id, asset, exchange)
 
-            timestamp = datetime.now(timezone.utc).isoformat()
-            message = f"⚠️ {timestamp} — {asset} on {exchange} price {price} crossed your threshold {threshold}"
-
-            alert = {
-                "user_id": str(user_id),
-                "asset": asset,
-                "exchange": exchange,
-                "price": price,
-                "threshold": threshold,
-                "timestamp": timestamp,
-                "message": message
-            }
-            alerts_to_push.append(alert)
-            # record timestamp to avoid duplicates
-            await record_alert_timestamp(user_id, asset, exchange)
-
-    # Push alerts into the Redis stream in parallel
+    # Push alerts into the Redis stream in parallel (or hold them while the alert service is behind)
     if alerts_to_push:
         try:
-            await asyncio.gather(*[
-                r.xadd(ALERT_STREAM, {"data": json.dumps(a)})
-                for a in alerts_to_push
-            ])
-            logger.info("Pushed %d alerts for %s on %s", len(alerts_to_push), asset, exchange)
+            xadd_ts = time.monotonic()
+            for a in alerts_to_push:
+                if "trace" in a:
+                    a["trace"]["xadd"] = xadd_ts
+            pushed = await backpressure.publish(r, alerts_to_push)
+            if pushed:
+                logger.info("Pushed %d alerts for %s on %s", pushed, asset, exchange)
+            else:
+                logger.debug("Holding %d alerts for %s on %s (backpressure)", len(alerts_to_push), asset, exchange)
         except Exception:
             logger.exception("Failed to push alerts to stream %s", ALERT_STREAM)
 
 
-async def poll_loop():
-    timeout = aiohttp.ClientTimeout(total=FETCH_TIMEOUT)
-    async with aiohttp.ClientSession(timeout=timeout) as session:
-        logger.info("Worker poll loop started (interval=%ss, concurrency=%s)", POLL_INTERVAL, MAX_CONCURRENT_FETCHES)
+class ExchangeStats:
+    __slots__ = ("interval", "lag", "cycle_seconds", "cycles", "missed", "restarts")
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.lag = 0.0             # how late the last cycle started vs its deadline
+        self.cycle_seconds = 0.0   # duration of the last cycle
+        self.cycles = 0
+        self.missed = 0            # deadlines skipped because a cycle overran
+        self.restarts = 0
+
+
+class ExchangeSupervisor:
+    """
+    Runs one independent refresh loop per exchange. Each loop keeps its own cadence on a
+    fixed grid of monotonic deadlines, so a slow exchange only delays itself. The
+    supervisor reloads the pair list, starts/stops loops as exchanges appear/disappear,
+    restarts loops that crash and reports per-exchange lag.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, profiler: CycleProfiler):
+        self.session = session
+        self.profiler = profiler
+        self.pairs: Dict[str, Dict[str, bool]] = {}   # exchange -> {asset: viewed}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, ExchangeStats] = {}
+
+    async def refresh_pairs(self):
+        view_pairs = await load_view_pairs()
+        pairs: Dict[str, Dict[str, bool]] = {}
+        for asset, exchange in view_pairs:
+            pairs.setdefault(exchange, {})[asset] = True
+        async for asset, exchange in load_active_pairs():
+            pairs.setdefault(exchange, {}).setdefault(asset, False)
+        self.pairs = pairs
+
+    def ensure_loops(self):
+        for exchange in self.pairs:
+            task = self.tasks.get(exchange)
+            if task is not None and not task.done():
+                continue
+            stats = self.stats.get(exchange)
+            if task is not None:
+                exc = None if task.cancelled() else task.exception()
+                logger.error("Exchange loop for %s stopped (%r); restarting", exchange, exc)
+                stats.restarts += 1
+            elif stats is None:
+                stats = self.stats[exchange] = ExchangeStats(EXCHANGE_INTERVALS.get(exchange, POLL_INTERVAL))
+            self.tasks[exchange] = asyncio.create_task(self.exchange_loop(exchange, stats))
+
+        for exchange in [ex for ex in self.tasks if ex not in self.pairs]:
+            logger.info("No more pairs on %s; stopping its loop", exchange)
+            self.tasks.pop(exchange).cancel()
+            self.stats.pop(exchange, None)
+            fetch_semaphores.pop(exchange, None)
+
+    async def exchange_loop(self, exchange: str, stats: ExchangeStats):
+        interval = stats.interval
+        deadline = time.monotonic()
         while True:
+            now = time.monotonic()
+            if now < deadline:
+                await asyncio.sleep(deadline - now)
+            started = time.monotonic()
+            stats.lag = started - deadline
+
             try:
-                # Build list of (asset, exchange) to process from active_pairs
-                tasks = []
-                async for asset, exchange in load_active_pairs():
-                    # create a task per pair
-                    tasks.append(asyncio.create_task(process_pair(asset, exchange, session)))
-
-                if tasks:
-                    # Run them concurrently (limited by the semaphore inside safe_fetch)
-                    await asyncio.gather(*tasks, return_exceptions=True)
+                await self.run_cycle(exchange)
+            except Exception:
+                logger.exception("Error during %s poll cycle", exchange)
+
+            finished = time.monotonic()
+            stats.cycle_seconds = finished - started
+            stats.cycles += 1
+            # Next slot on the fixed grid; slots that already passed are skipped, not queued
+            deadline += interval
+            if deadline <= finished:
+                missed = int((finished - deadline) // interval) + 1
+                stats.missed += missed
+                deadline += missed * interval
+
+    async def run_cycle(self, exchange: str):
+        assets = self.pairs.get(exchange)
+        if not assets:
+            return
+        # One read and parse of pair:{exchange} per cycle, shared by every asset on it
+        index = await load_subscription_index(exchange)
+        if index is None:
+            return
+        # Profiling hooks are skipped entirely unless a session is armed or slow-cycle capture is on
+        cycle = self.profiler.cycle_start(exchange) if self.profiler.active else None
+
+        try:
+            tasks = []
+            snapshots: Dict[str, str] = {}
+            for asset, viewed in assets.items():
+                if cycle is not None:
+                    coro = self.profiler.timed(cycle, asset, exchange, process_pair,
+                                               asset, exchange, self.session, index, viewed, snapshots)
                 else:
-                    logger.debug("No active pairs found")
+                    coro = process_pair(asset, exchange, self.session, index, viewed, snapshots)
+                tasks.append(asyncio.create_task(coro))
+            # Run them concurrently (limited by this exchange's semaphore inside safe_fetch)
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # After the alerts went out, so snapshot writes never delay them
+            await publish_snapshots(exchange, snapshots)
+
+            if recorder is not None:
+                recorder.flush()
+        finally:
+            # Also on errors and cancellation, so an armed cProfile session is still counted down and dumped
+            if cycle is not None:
+                self.profiler.cycle_end(cycle)
+
+    async def report_lag(self):
+        if not self.stats:
+            return
+        report = {}
+        for exchange, st in sorted(self.stats.items()):
+            logger.info("Exchange %s: interval=%.2fs lag=%.3fs cycle=%.3fs cycles=%d missed=%d restarts=%d",
+                        exchange, st.interval, st.lag, st.cycle_seconds, st.cycles, st.missed, st.restarts)
+            report[exchange] = json.dumps({
+                "interval": st.interval, "lag": st.lag, "cycle_seconds": st.cycle_seconds,
+                "cycles": st.cycles, "missed": st.missed, "restarts": st.restarts,
+            })
+        try:
+            await r.hset(EXCHANGE_LAG_KEY, mapping=report)
+        except Exception:
+            logger.exception("Failed to publish exchange lag to %s", EXCHANGE_LAG_KEY)
 
+    async def run(self):
+        next_control_check = next_report = 0.0
+        while True:
+            try:
+                now = time.monotonic()
+                if now >= next_control_check:
+                    await self.profiler.poll_control_key(r, PROFILE_CONTROL_KEY)
+                    next_control_check = now + PROFILE_CONTROL_POLL
+                await backpressure.refresh(r)
+                await self.refresh_pairs()
+                if not self.pairs:
+                    logger.debug("No active pairs found")
+                self.ensure_loops()
+                if now >= next_report:
+                    await self.report_lag()
+                    next_report = now + LAG_REPORT_INTERVAL
             except Exception:
-                logger.exception("Error during poll cycle")
-            await asyncio.sleep(POLL_INTERVAL)
+                logger.exception("Error in exchange supervisor")
+            await asyncio.sleep(SUPERVISOR_INTERVAL)
+
+
+async def poll_loop():
+    timeout = aiohttp.ClientTimeout(total=FETCH_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        logger.info("Worker poll loop started (interval=%ss, per-exchange=%s, concurrency=%s per exchange)",
+                    POLL_INTERVAL, EXCHANGE_INTERVALS or "-", MAX_CONCURRENT_FETCHES)
+        profiler = CycleProfiler(PROFILE_DIR, SLOW_CYCLE_SECONDS, PROFILE_CYCLES)
+        profiler.install_signal_handler()
+        profiler.start_lag_probe()
+        supervisor = ExchangeSupervisor(session, profiler)
+        try:
+            await supervisor.run()
+        finally:
+            for task in supervisor.tasks.values():
+                task.cancel()
 
 
 if __name__ == "__main__":